@@ -1,22 +1,55 @@
 import re
-import PyPDF2
+import argparse
 from fpdf import FPDF
+import Run_Metrics as metrics
+import Pdf_Extraction as pdf_text
 
-# Function to extract data from the provided PDF and filter out unwanted substrings
-def extract_data_from_pdf(file_path):
-    with open(file_path, 'rb') as file:
-        reader = PyPDF2.PdfReader(file)
-        text = "".join(page.extract_text() for page in reader.pages)
-    
-    # Remove substrings matching the date format and page numbering format
-    text = re.sub(r"\b(?:Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday), [A-Za-z]+ \d{1,2}, \d{4}\b", "", text)
-    text = re.sub(r"Page \d+ of \d+", "", text)
-    return text
+# Number of worker processes used to parse the report pages (None = one per CPU core, 1 = serial)
+parse_workers = None
+
+# Page text extraction backend (see Pdf_Extraction.py): "pypdf2", "pypdfium2" or "pdfplumber"
+extraction_backend = "pypdf2"
+
+# Report date and page numbering text, removed from every page before it is parsed
+date_pattern = re.compile(r"\b(?:Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday), [A-Za-z]+ \d{1,2}, \d{4}\b")
+page_number_pattern = re.compile(r"Page \d+ of \d+")
+
+# Function to filter the unwanted substrings out of one page's text and parse it
+def parse_page_text(text):
+    """Removes the report date and page numbering from a page's text and returns its (name, points) tuples."""
+    text = date_pattern.sub("", text)
+    text = page_number_pattern.sub("", text)
+    return parse_employee_data(text)
+
+def parse_page_batch(file_path, page_indexes, backend):
+    """Worker for parallel parsing (see pdf_text.parse_pages_parallel): the given pages' (name, points) tuples."""
+    return [employee for text in pdf_text.page_texts(file_path, page_indexes, backend) for employee in parse_page_text(text)]
+
+# Function to extract data from the provided PDF, one page at a time
+def extract_employee_data(file_path, workers=None, backend=None):
+    """
+    Yields the (name, points) tuples of every page of the report in page order.
+
+    Each page is cleaned and parsed on its own, so no line can run across a page break and
+    only a page's text (or a few batches of pages per worker) is held at once. Pages are
+    parsed across a process pool unless workers == 1, with the extraction backend (default
+    extraction_backend).
+    """
+    backend = backend or extraction_backend
+    page_count = pdf_text.page_count(file_path)
+    metrics.count("pages", page_count)
+    if workers == 1:
+        for text in pdf_text.page_texts(file_path, backend=backend):
+            yield from parse_page_text(text)
+        return
+
+    yield from pdf_text.parse_pages_parallel(parse_page_batch, file_path, range(page_count), workers, backend)
 
 # Function to parse the text and extract employee data
 def parse_employee_data(text):
     employees = []
     lines = text.splitlines()
+    metrics.count("lines", len(lines))
     for line in lines:
         if '-' in line and 'Value' in line:
             parts = line.split(' - ')
@@ -27,6 +60,7 @@ def parse_employee_data(text):
                     if points > 0:  # Exclude employees with zero points
                         employees.append((name, points))
                 except ValueError:
+                    metrics.count("lines_skipped")
                     print(f"Skipping line due to invalid points format: {line}")
     return employees
 
@@ -69,9 +103,27 @@ def create_sorted_pdf(employees, output_path):
 input_pdf_path = r'C:\Users\Laptop 122\Desktop\Store Prep\06 Employee Reports\CallInsReport.pdf'
 output_pdf_path = r'C:\Users\Laptop 122\Desktop\Store Prep\06 Employee Reports\SortedAttendancePoints.pdf'
 
-# Execution
-pdf_text = extract_data_from_pdf(input_pdf_path)
-employee_data = parse_employee_data(pdf_text)
-create_sorted_pdf(employee_data, output_pdf_path)
+# Execution (the __main__ guard lets parse workers import this module without re-running the script)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sorts the call-ins report by attendance points.")
+    parser.add_argument("--backend", choices=pdf_text.text_backends, default=extraction_backend,
+                        help="page text extraction backend (default: %(default)s)")
+    parser.add_argument("--metrics", metavar="JSON", help="record stage timings and counters to this JSON run summary")
+    args = parser.parse_args()
+    extraction_backend = args.backend
+    if args.metrics:
+        metrics.enable()
+
+    # Pages are extracted and parsed as they stream in, so the two are timed as one stage
+    with metrics.stage("extraction"):
+        employee_data = list(extract_employee_data(input_pdf_path, parse_workers))
+    metrics.count("employees", len(employee_data))
+    with metrics.stage("rendering"):
+        create_sorted_pdf(employee_data, output_pdf_path)
+    metrics.file_written(output_pdf_path)
 
-print(f"Sorted PDF created at {output_pdf_path}")
+    print(f"Sorted PDF created at {output_pdf_path}")
+    metrics.write_summary(args.metrics, "AbsentReport", rates={
+        "pages/sec": ("pages", "extraction"),
+        "lines/sec": ("lines", "extraction"),
+    })
@@ -0,0 +1,173 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import pdfplumber
+import PyPDF2
+import Run_Metrics as metrics
+
+# pypdfium2 is optional: it is only needed for the "pypdfium2" and "columns" backends
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
+# Page text extraction shared by the report scripts, with selectable backends:
+#   pdfplumber  full layout analysis of every character, line and rect (the slowest)
+#   pypdf2      PyPDF2's text of the page content stream
+#   pypdfium2   PDFium's text layer, text only and much faster than either
+# Every text backend returns a page's text as "\n"-separated lines. The "columns" backend reads
+# PDFium's text runs with their positions instead and returns each line as cells sorted into the
+# report's column bands (see page_cells), so the columns don't have to be guessed from the text.
+text_backends = ["pdfplumber", "pypdf2", "pypdfium2"]
+backends = text_backends + ["columns"]
+
+# Header titles of the production report's metric columns; their positions on the page are the
+# column bands
+header_columns = ["Pieces/Hr", "$/Hr", "Skus/Hr"]
+
+# Text runs whose vertical centers are this close (in points) are on the same line
+line_tolerance = 2.0
+
+def open_pdfium(path):
+    if pdfium is None:
+        raise RuntimeError("The pypdfium2 and columns extraction backends need pypdfium2")
+    return pdfium.PdfDocument(path)
+
+def page_count(path):
+    with open(path, "rb") as file:
+        return len(PyPDF2.PdfReader(file).pages)
+
+def page_texts(path, page_indexes=None, backend="pdfplumber"):
+    """Yields the text of the given (0-based, ascending) pages of the PDF, or of every page, in order."""
+    if backend == "pdfplumber":
+        pages = None if page_indexes is None else [i + 1 for i in page_indexes]
+        with pdfplumber.open(path, pages=pages) as pdf:
+            for page in pdf.pages:
+                text = page.extract_text()
+                page.close()  # Drop the page's cached layout objects so memory stays flat
+                yield text
+    elif backend == "pypdf2":
+        with open(path, "rb") as file:
+            reader = PyPDF2.PdfReader(file)
+            for i in range(len(reader.pages)) if page_indexes is None else page_indexes:
+                yield reader.pages[i].extract_text()
+    elif backend == "pypdfium2":
+        document = open_pdfium(path)
+        try:
+            for i in range(len(document)) if page_indexes is None else page_indexes:
+                page = document[i]
+                textpage = page.get_textpage()
+                yield textpage.get_text_range().replace("\r\n", "\n")
+                textpage.close()
+                page.close()
+        finally:
+            document.close()
+    else:
+        raise ValueError(f"Unknown text extraction backend {backend!r}")
+
+def text_lines(textpage):
+    """
+    The page's text runs grouped into lines, top to bottom, each a list of (left, right, text)
+    runs from left to right.
+    """
+    runs = []
+    for i in range(textpage.count_rects()):
+        left, bottom, right, top = textpage.get_rect(i)
+        text = textpage.get_text_bounded(left, bottom, right, top).strip()
+        if text:
+            runs.append(((bottom + top) / 2, left, right, text))
+
+    # PDF coordinates grow upwards, so the highest center comes first
+    runs.sort(key=lambda run: -run[0])
+    lines = []
+    for center, left, right, text in runs:
+        if lines and lines[-1][0] - center <= line_tolerance:
+            lines[-1][1].append((left, right, text))
+        else:
+            lines.append((center, [(left, right, text)]))
+    return [sorted(line) for _, line in lines]
+
+def find_column_bands(path):
+    """
+    The {title: (left, right)} bands of the header_columns, from the first line of the PDF that
+    has all their titles as separate text runs, or None if no page has one.
+    """
+    document = open_pdfium(path)
+    try:
+        for i in range(len(document)):
+            page = document[i]
+            textpage = page.get_textpage()
+            lines = text_lines(textpage)
+            textpage.close()
+            page.close()
+            for line in lines:
+                titles = {text: (left, right) for left, right, text in line}
+                if all(title in titles for title in header_columns):
+                    return {title: titles[title] for title in header_columns}
+    finally:
+        document.close()
+    return None
+
+def cell_column(left, right, bands):
+    """The band a text run overlaps the most, or None if it overlaps none."""
+    overlaps = {title: min(right, band_right) - max(left, band_left) for title, (band_left, band_right) in bands.items()}
+    title = max(overlaps, key=overlaps.get)
+    return title if overlaps[title] > 0 else None
+
+def page_cells(path, page_indexes=None, bands=None):
+    """
+    Yields every given (0-based, ascending) page, or every page, of the PDF as a list of lines,
+    each a list of (text, column) cells from left to right. column is the header_columns title
+    whose band (see find_column_bands) the cell falls in, or None for the cells to the left
+    of them (date, store, employee names, footers).
+    """
+    document = open_pdfium(path)
+    try:
+        for i in range(len(document)) if page_indexes is None else page_indexes:
+            page = document[i]
+            textpage = page.get_textpage()
+            yield [[(text, cell_column(left, right, bands)) for left, right, text in line] for line in text_lines(textpage)]
+            textpage.close()
+            page.close()
+    finally:
+        document.close()
+
+def run_page_batch(parse_batch, path, page_indexes, record_metrics, args):
+    """
+    Worker for parse_pages_parallel: returns parse_batch(path, page_indexes, *args), and with
+    record_metrics the worker's metrics along with it.
+    """
+    if record_metrics:
+        metrics.enable()
+    results = parse_batch(path, page_indexes, *args)
+    return (results, metrics.snapshot()) if record_metrics else results
+
+def batch_results(future):
+    """A run_page_batch batch's results, folding the worker's metrics in when they're recorded."""
+    if not metrics.enabled:
+        return future.result()
+    results, recorded = future.result()
+    metrics.merge(recorded)
+    return results
+
+def parse_pages_parallel(parse_batch, path, page_indexes, workers=None, *args):
+    """
+    Runs parse_batch(path, batch, *args) over batches of the given (0-based, ascending) pages
+    of the PDF across a process pool and yields the items of the lists it returns, in page
+    order. parse_batch must be a module-level function so it can be sent to the workers.
+    """
+    workers = workers or os.cpu_count() or 1
+
+    # Hand out a few page batches per worker so one slow batch doesn't leave the others idle,
+    # capped so a huge report isn't held in memory a quarter at a time
+    batch_size = max(1, min(200, -(-len(page_indexes) // (workers * 4))))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Only keep a couple of batches per worker in flight so finished results don't pile up
+        pending = deque()
+        for start in range(0, len(page_indexes), batch_size):
+            batch = page_indexes[start:start + batch_size]
+            pending.append(executor.submit(run_page_batch, parse_batch, path, batch, metrics.enabled, args))
+            if len(pending) >= workers * 2:
+                yield from batch_results(pending.popleft())
+        while pending:
+            yield from batch_results(pending.popleft())
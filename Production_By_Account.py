@@ -1,17 +1,34 @@
 import pandas as pd
 from fpdf import FPDF
+import argparse
 import os
+import time
+import numpy as np
+from Production_Data import load_production_data, build_value_index, match_codes, code_positions, metric_columns
+from Report_Tables import format_metric, format_dates, truncate_column, table_rows, draw_table_rows
+import Run_Metrics as metrics
 
-# Helper function to truncate text so it doesn't overflow in the cell
-def truncate_text(text, max_length=40):
-    """
-    Truncates a string to max_length characters, adding '...' if it's too long.
-    """
-    text = str(text)
-    if len(text) <= max_length:
-        return text
-    else:
-        return text[:max_length-3] + "..."
+# Mapping for account groups.
+# For example, "Kroger" expands to "pick", "mariano", and "metro"
+account_groups = {
+    "kroger": ["pick", "mariano", "metro"],
+    "f": ["pig", "festival", "sendik"]
+    # Add more groups as needed
+}
+
+# Paths to the typed production store and the CSV it falls back to
+store_path = r"C:\Users\Laptop 122\Desktop\Store Prep\06 Employee Reports\EmployeeProduction.parquet"
+file_path = r"C:\Users\Laptop 122\Desktop\Store Prep\06 Employee Reports\EmployeeProduction.csv"
+
+# Where the searched reports are written
+output_dir = r"C:\Users\Laptop 122\Desktop\Store Prep\06 Employee Reports\SearchedProductionReports"
+
+# Sort choices for the individual averages table: column and ascending
+sort_orders = {
+    "1": ("Employee", True),
+    "2": ("Pieces/Hr", False),
+    "3": ("$/Hr", False),
+}
 
 class PDF(FPDF):
     def header(self):
@@ -24,39 +41,12 @@ class PDF(FPDF):
         self.set_font("Arial", "I", 8)
         self.cell(0, 10, f"Page {self.page_no()}", 0, 0, "C")
 
-def main():
-    # Mapping for account groups.
-    # For example, "Kroger" expands to "pick", "mariano", and "metro"
-    account_groups = {
-        "kroger": ["pick", "mariano", "metro"],
-        "f": ["pig", "festival", "sendik"]
-        # Add more groups as needed
-    }
-    
-    # Path to the CSV file
-    file_path = r"C:\Users\Laptop 122\Desktop\Store Prep\06 Employee Reports\EmployeeProduction.csv"
-    
-    # Read the CSV file into a DataFrame
-    try:
-        df = pd.read_csv(file_path)
-    except Exception as e:
-        print(f"Error reading the CSV file: {e}")
-        return
-
-    # Clean and convert performance metric columns to numeric values
-    df["Pieces/Hr"] = pd.to_numeric(df["Pieces/Hr"].str.replace(",", "", regex=True), errors="coerce")
-    df["$/Hr"]      = pd.to_numeric(df["$/Hr"].str.replace("[\$,]", "", regex=True), errors="coerce")
-    df["Skus/Hr"]   = pd.to_numeric(df["Skus/Hr"].str.replace(",", "", regex=True), errors="coerce")
+def split_terms(text):
+    """Splits comma-separated search input into a list of trimmed, non-blank terms."""
+    return [term.strip() for term in text.split(",") if term.strip()]
 
-    # Prompt user for multiple employee names and store substrings
-    name_search_input = input("Enter employee names (comma-separated, leave blank for all): ").strip()
-    store_search_input = input("Enter store substrings (comma-separated, leave blank for all): ").strip()
-
-    # Convert inputs into lists
-    name_search_list = [name.strip() for name in name_search_input.split(",") if name.strip()]
-    store_search_list = [store.strip() for store in store_search_input.split(",") if store.strip()]
-    
-    # Expand store search list if any term matches a group name in our mapping
+def expand_store_terms(store_search_list):
+    """Expands any term that matches a group name in account_groups (case-insensitive)."""
     expanded_store_search_list = []
     for term in store_search_list:
         key = term.lower()  # case-insensitive matching
@@ -64,40 +54,189 @@ def main():
             expanded_store_search_list.extend(account_groups[key])
         else:
             expanded_store_search_list.append(term)
-    
-    # Determine filtering logic
-    if name_search_list:
+    return expanded_store_search_list
+
+def parse_query_spec(spec):
+    """
+    Parses one batch query of the form "names|stores|sort", e.g. "smith,doe|kroger|2".
+    Names and stores are comma-separated (blank for all); sort is a sort_orders choice and
+    defaults to alphabetical when left off.
+    """
+    fields = [field.strip() for field in spec.split("|")]
+    if len(fields) > 3:
+        raise ValueError(f"Expected names|stores|sort, got: {spec!r}")
+    fields += [""] * (3 - len(fields))
+    return split_terms(fields[0]), split_terms(fields[1]), fields[2] or "1"
+
+def read_query_file(path):
+    """Reads query specs from a file, one per line; blank lines and # comments are skipped."""
+    with open(path, encoding="utf-8") as file:
+        lines = [line.strip() for line in file]
+    return [parse_query_spec(line) for line in lines if line and not line.startswith("#")]
+
+def build_search_index(df):
+    """
+    Builds the Employee and Store lookup indexes for the loaded data (see build_value_index),
+    with every account group resolved up front to the store codes it covers. The rollup cube
+    the searches' averages are summed from is built on the first query (see rollup_cube).
+    """
+    stores = build_value_index(df["Store"])
+    return {
+        "Employee": build_value_index(df["Employee"]),
+        "Store": stores,
+        "groups": {key: match_codes(stores, terms) for key, terms in account_groups.items()},
+        "cube": None,
+    }
+
+def rollup_cube(df, index):
+    """The index's rollup cube of df, built the first time it's needed."""
+    if index["cube"] is None:
+        with metrics.stage("cube"):
+            index["cube"] = build_rollup_cube(df, index["groups"])
+    return index["cube"]
+
+def build_rollup_cube(df, groups):
+    """
+    Rolls the rows up to one cell per (account group, store, employee, month), holding for
+    each metric the sum and count of its positive values (for the account averages) and of
+    all its recorded values (for the individual averages). A search's averages are then sums
+    over the few cells it covers instead of a scan of its rows.
+
+    The sums are whole cents (int64), as every metric has two decimals, so they are exact and
+    don't depend on how the rows are split into cells (see cent_averages).
+
+    Account Group lists the account_groups a store belongs to (comma-separated, "" for none);
+    groups maps each to its store codes. Employee and Store keep df's categories, and rows
+    without a store, employee or date get cells of their own.
+    """
+    values = df[metric_columns].to_numpy("float64")
+    recorded = ~np.isnan(values)
+    positive = values > 0
+    cents = np.rint(np.where(recorded, values, 0.0) * 100).astype(np.int64)
+    cells = pd.DataFrame({
+        "Store": df["Store"].cat.codes.to_numpy(),
+        "Employee": df["Employee"].cat.codes.to_numpy(),
+        "Month": df["Date"].to_numpy().astype("datetime64[M]"),
+    })
+    for i, column in enumerate(metric_columns):
+        cells[f"{column} Cents"] = cents[:, i]
+        cells[f"{column} Count"] = recorded[:, i].astype(np.int64)
+        cells[f"{column} Positive Cents"] = np.where(positive[:, i], cents[:, i], 0)
+        cells[f"{column} Positive Count"] = positive[:, i].astype(np.int64)
+    cube = cells.groupby(["Store", "Employee", "Month"], sort=True, dropna=False).sum().reset_index()
+
+    # Label every store code with its groups; code -1 (no store) takes the last, blank label
+    labels = [[] for _ in range(len(df["Store"].cat.categories) + 1)]
+    for key, codes in groups.items():
+        for code in codes:
+            labels[code].append(key)
+    labels = np.array([",".join(keys) for keys in labels], dtype=object)
+    cube.insert(0, "Account Group", pd.Categorical(labels[cube["Store"].to_numpy()]))
+    cube["Store"] = pd.Categorical.from_codes(cube["Store"], df["Store"].cat.categories)
+    cube["Employee"] = pd.Categorical.from_codes(cube["Employee"], df["Employee"].cat.categories)
+    return cube
+
+def store_codes(index, store_search_list):
+    """Store codes matched by the search terms, using the prebuilt set for account group names."""
+    groups = index["groups"]
+    matched = [groups[term.lower()] for term in store_search_list if term.lower() in groups]
+    matched.append(match_codes(index["Store"], [term for term in store_search_list if term.lower() not in groups]))
+    return np.unique(np.concatenate(matched))
+
+def search_codes(index, name_search_list, store_search_list):
+    """The employee and store codes a search matches (None for a blank list, which matches all)."""
+    employees = match_codes(index["Employee"], name_search_list) if name_search_list else None
+    stores = store_codes(index, store_search_list) if store_search_list else None
+    return employees, stores
+
+def filter_production(df, index, name_search_list, store_search_list):
+    """
+    Returns the rows matching the search and the column the detail section groups by.
+    Terms are case-insensitive substrings matched against the distinct names in index.
+    """
+    employees, stores = search_codes(index, name_search_list, store_search_list)
+    if employees is not None:
         # If employee names are provided, filter by employee and optionally by store if provided
-        filtered = df[
-            df["Employee"].str.contains('|'.join(name_search_list), case=False, na=False) &
-            (df["Store"].str.contains('|'.join(expanded_store_search_list), case=False, na=False) if expanded_store_search_list else True)
-        ]
+        positions = code_positions(index["Employee"], employees)
+        if stores is not None:
+            positions = positions[np.isin(index["Store"]["codes"][positions], stores)]
         group_by = "Store"
-    else:
+    elif stores is not None:
         # If no specific employee is provided, filter by store substrings only
-        filtered = df[
-            df["Store"].str.contains('|'.join(expanded_store_search_list), case=False, na=False) if expanded_store_search_list else True
-        ]
+        positions = code_positions(index["Store"], stores)
         group_by = "Employee"
+    else:
+        return df, "Employee"
+    return df.iloc[positions], group_by
 
-    if filtered.empty:
-        print("No records found for the given search criteria.")
-        return
+def covered_stores(cube, index, store_search_list):
+    """
+    Which cube cells the store terms cover: account group names through the cells' Account
+    Group labels, any other term through the store codes it matches.
+    """
+    keys = {term.lower() for term in store_search_list if term.lower() in index["groups"]}
+    labels = cube["Account Group"].cat
+    in_groups = np.array([bool(keys & set(label.split(","))) for label in labels.categories], dtype=bool)
+    covered = in_groups[labels.codes.to_numpy()]
+    terms = [term for term in store_search_list if term.lower() not in index["groups"]]
+    if terms:
+        covered |= np.isin(cube["Store"].cat.codes.to_numpy(), match_codes(index["Store"], terms))
+    return covered
+
+def cent_averages(cents, counts):
+    """
+    Averages of summed whole cents, rounded to the cent with halves rounded up, as values
+    (NaN where the count is 0).
+    """
+    cents = np.asarray(cents, dtype=np.int64)
+    counts = np.asarray(counts, dtype=np.int64)
+    rounded = (2 * cents + counts) // np.maximum(2 * counts, 1)
+    return np.where(counts > 0, rounded / 100, np.nan)
+
+def rollup_averages(df, index, name_search_list, store_search_list):
+    """
+    The search's account averages (positive values only, keyed by metric) and individual
+    averages (a row per employee), summed from the rollup cube's cells instead of the rows
+    and rounded to the cent (see cent_averages).
+    """
+    cube = rollup_cube(df, index)
+    covered = np.ones(len(cube), dtype=bool)
+    if name_search_list:
+        covered &= np.isin(cube["Employee"].cat.codes.to_numpy(), match_codes(index["Employee"], name_search_list))
+    if store_search_list:
+        covered &= covered_stores(cube, index, store_search_list)
+    cells = cube[covered]
 
-    # Calculate overall averages for the filtered dataset
-    avg_pieces_overall = filtered.loc[filtered["Pieces/Hr"] > 0, "Pieces/Hr"].mean()
-    avg_dollars_overall = filtered.loc[filtered["$/Hr"] > 0, "$/Hr"].mean()
-    avg_skus_overall = filtered.loc[filtered["Skus/Hr"] > 0, "Skus/Hr"].mean()
+    totals = cells.drop(columns=["Account Group", "Store", "Employee", "Month"]).sum()
+    by_employee = cells.drop(columns=["Account Group", "Store", "Month"]).groupby("Employee", observed=True).sum()
+    employee_averages = pd.DataFrame({"Employee": by_employee.index})
+    account_averages = {
+        column: float(cent_averages(totals[f"{column} Positive Cents"], totals[f"{column} Positive Count"]))
+        for column in metric_columns
+    }
+    for column in metric_columns:
+        employee_averages[column] = cent_averages(by_employee[f"{column} Cents"], by_employee[f"{column} Count"])
+    return account_averages, employee_averages
+
+def build_report(filtered, group_by, name_search_list, expanded_store_search_list, sort_choice, averages):
+    """
+    Lays out the production report for the filtered rows and returns the PDF. averages are
+    the search's rollup_averages; the rows are only read for the detail section.
+    """
+    account_averages, employee_averages = averages
+    avg_pieces_overall = account_averages["Pieces/Hr"]
+    avg_dollars_overall = account_averages["$/Hr"]
+    avg_skus_overall = account_averages["Skus/Hr"]
 
     # Prepare PDF
     pdf = PDF()
     pdf.add_page()
     pdf.set_font("Arial", "", 12)
-    
+
     # Display the search criteria at the top of the report
     pdf.cell(0, 10, f"Search Criteria: Employees: {', '.join(name_search_list) if name_search_list else 'All'}, Stores: {', '.join(expanded_store_search_list) if expanded_store_search_list else 'All'}", ln=True)
     pdf.ln(5)
-    
+
     # Add the overall account averages section
     pdf.set_font("Arial", "B", 12)
     pdf.cell(0, 10, "Account Averages:", ln=True)
@@ -107,25 +246,13 @@ def main():
     pdf.cell(0, 10, f"Skus/Hr: {avg_skus_overall:.2f}" if pd.notna(avg_skus_overall) else "Skus/Hr: No Data", ln=True)
     pdf.ln(10)
 
-    # Calculate individual averages by grouping by 'Employee'
-    employee_averages = filtered.groupby("Employee").agg({
-        "Pieces/Hr": "mean",
-        "$/Hr": "mean",
-        "Skus/Hr": "mean"
-    }).reset_index()
-    
-    # Prompt the user for sorting preference using numeric choices
-    sort_choice = input("Enter sort order for individual averages:\n1 - Alphabetical (by Employee)\n2 - Pieces/Hr (highest first)\n3 - $/Hr (highest first)\nYour choice: ").strip()
-    if sort_choice == "1":
-        employee_averages = employee_averages.sort_values(by="Employee", ascending=True)
-    elif sort_choice == "2":
-        employee_averages = employee_averages.sort_values(by="Pieces/Hr", ascending=False)
-    elif sort_choice == "3":
-        employee_averages = employee_averages.sort_values(by="$/Hr", ascending=False)
-    else:
+    # Sort by the chosen column, defaulting to alphabetical
+    if sort_choice not in sort_orders:
         print("Invalid choice, defaulting to alphabetical sorting.")
-        employee_averages = employee_averages.sort_values(by="Employee", ascending=True)
-    
+        sort_choice = "1"
+    sort_column, ascending = sort_orders[sort_choice]
+    employee_averages = employee_averages.sort_values(by=sort_column, ascending=ascending)
+
     # Add a section for each individual's averages
     pdf.set_font("Arial", "B", 12)
     pdf.cell(0, 10, "Individual Averages:", ln=True)
@@ -135,18 +262,34 @@ def main():
     pdf.cell(30, 10, "$/Hr", border=1, align="C")
     pdf.cell(30, 10, "Skus/Hr", border=1, align="C")
     pdf.ln()
-    
+
     pdf.set_font("Arial", "", 10)
-    for _, row in employee_averages.iterrows():
-        pdf.cell(50, 10, truncate_text(row["Employee"], 25), border=1, align="C")
-        pdf.cell(30, 10, f"{row['Pieces/Hr']:.2f}" if pd.notna(row['Pieces/Hr']) else "N/A", border=1, align="C")
-        pdf.cell(30, 10, f"{row['$/Hr']:.2f}" if pd.notna(row['$/Hr']) else "N/A", border=1, align="C")
-        pdf.cell(30, 10, f"{row['Skus/Hr']:.2f}" if pd.notna(row['Skus/Hr']) else "N/A", border=1, align="C")
-        pdf.ln()
+    rows = table_rows(
+        truncate_column(employee_averages["Employee"], 25),
+        format_metric(employee_averages["Pieces/Hr"]),
+        format_metric(employee_averages["$/Hr"]),
+        format_metric(employee_averages["Skus/Hr"]),
+    )
+    draw_table_rows(pdf, [50, 30, 30, 30], ["C", "C", "C", "C"], rows)
     pdf.ln(10)
 
+    # Format the detail table columns for the whole filtered dataset at once
+    if group_by == "Store":
+        # When grouped by Store, display Employee names (truncate at 25 chars)
+        name_column = truncate_column(filtered["Employee"], 25)
+    else:
+        # When grouped by Employee, display Store names (truncate at 20 chars to prevent overflow)
+        name_column = truncate_column(filtered["Store"], 20)
+    detail = pd.DataFrame({
+        "Date": format_dates(filtered["Date"]),
+        "Name": name_column,
+        "Pieces/Hr": format_metric(filtered["Pieces/Hr"]),
+        "$/Hr": format_metric(filtered["$/Hr"]),
+        "Skus/Hr": format_metric(filtered["Skus/Hr"]),
+    })
+
     # Group and display detailed production data
-    grouped = filtered.groupby(group_by)
+    grouped = filtered.groupby(group_by, observed=True)
     for key, group in grouped:
         pdf.set_font("Arial", "B", 12)
         pdf.cell(0, 10, f"{group_by}: {key}", ln=True)
@@ -162,31 +305,115 @@ def main():
 
         # Table rows
         pdf.set_font("Arial", "", 10)
-        for _, row in group.iterrows():
-            pdf.cell(30, 10, str(row["Date"]), border=1, align="C")
-            if group_by == "Store":
-                # When grouped by Store, display Employee names (truncate at 25 chars)
-                cell_text = truncate_text(row["Employee"], 25)
-            else:
-                # When grouped by Employee, display Store names (truncate at 15 chars to prevent overflow)
-                cell_text = truncate_text(row["Store"], 20)
-            pdf.cell(50, 10, cell_text, border=1, align="C")
-            pdf.cell(30, 10, f"{row['Pieces/Hr']:.2f}" if pd.notna(row["Pieces/Hr"]) else "N/A", border=1, align="C")
-            pdf.cell(30, 10, f"{row['$/Hr']:.2f}" if pd.notna(row["$/Hr"]) else "N/A", border=1, align="C")
-            pdf.cell(30, 10, f"{row['Skus/Hr']:.2f}" if pd.notna(row["Skus/Hr"]) else "N/A", border=1, align="C")
-            pdf.ln()
-
-
-    # Generate output file name
-    output_dir = r"C:\Users\Laptop 122\Desktop\Store Prep\06 Employee Reports\SearchedProductionReports"
-    os.makedirs(output_dir, exist_ok=True)
+        rows = table_rows(*(column for _, column in detail.loc[group.index].items()))
+        draw_table_rows(pdf, [30, 50, 30, 30, 30], ["C", "C", "C", "C", "C"], rows)
+
+    return pdf
+
+def report_name(name_search_list, expanded_store_search_list):
+    """File name for a search's report: <names>_<stores>.pdf."""
     sanitized_name = "_".join(name_search_list).replace(" ", "_") if name_search_list else "All"
     sanitized_store = "_".join(expanded_store_search_list).replace(" ", "_") if expanded_store_search_list else "All"
-    output_file = os.path.join(output_dir, f"{sanitized_name}_{sanitized_store}.pdf")
+    return f"{sanitized_name}_{sanitized_store}.pdf"
+
+def query_report(df, index, name_search_list, store_search_list, sort_choice):
+    """Builds the report for one search. Returns (pdf, file name), or None if nothing matched."""
+    expanded_store_search_list = expand_store_terms(store_search_list)
+    with metrics.stage("filter"):
+        filtered, group_by = filter_production(df, index, name_search_list, store_search_list)
+    metrics.count("rows_matched", len(filtered))
+    if filtered.empty:
+        return None
+    with metrics.stage("rollup"):
+        averages = rollup_averages(df, index, name_search_list, store_search_list)
+    with metrics.stage("build"):
+        pdf = build_report(filtered, group_by, name_search_list, expanded_store_search_list, sort_choice, averages)
+    return pdf, report_name(name_search_list, expanded_store_search_list)
+
+def run_query(df, index, name_search_list, store_search_list, sort_choice):
+    """Filters the loaded data for one search and writes its report. Returns the file path, or None if nothing matched."""
+    metrics.count("queries")
+    report = query_report(df, index, name_search_list, store_search_list, sort_choice)
+    if report is None:
+        metrics.count("queries_without_records")
+        print("No records found for the given search criteria.")
+        return None
+    pdf, file_name = report
 
     # Save the PDF report
-    pdf.output(output_file)
+    os.makedirs(output_dir, exist_ok=True)
+    output_file = os.path.join(output_dir, file_name)
+    with metrics.stage("write"):
+        pdf.output(output_file)
+    metrics.file_written(output_file)
     print(f"PDF report created: {output_file}")
+    return output_file
+
+def run_batch(df, index, queries):
+    """Runs every (names, stores, sort) query against the one loaded dataset, timing each."""
+    for number, (name_search_list, store_search_list, sort_choice) in enumerate(queries, 1):
+        print(f"[{number}/{len(queries)}] Employees: {', '.join(name_search_list) or 'All'}; Stores: {', '.join(store_search_list) or 'All'}; Sort: {sort_choice}")
+        start = time.perf_counter()
+        run_query(df, index, name_search_list, store_search_list, sort_choice)
+        print(f"[{number}/{len(queries)}] {time.perf_counter() - start:.2f}s")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Searched production reports. With no queries, prompts for a single search."
+    )
+    parser.add_argument("queries", nargs="*", metavar="QUERY",
+                        help='query spec "names|stores|sort", e.g. "smith,doe|kroger|2" or "|f|1"')
+    parser.add_argument("-f", "--query-file", action="append", default=[],
+                        help="file with one query spec per line (# comments allowed); may be repeated")
+    parser.add_argument("--metrics", metavar="JSON", help="record stage timings and counters to this JSON run summary")
+    args = parser.parse_args(argv)
+    if args.metrics:
+        metrics.enable()
+
+    try:
+        queries = [spec for path in args.query_file for spec in read_query_file(path)]
+        queries += [parse_query_spec(spec) for spec in args.queries]
+    except (OSError, ValueError) as e:
+        print(f"Error reading the queries: {e}")
+        return
+
+    # Read the production data (numeric metrics, real dates) into a DataFrame
+    start = time.perf_counter()
+    try:
+        with metrics.stage("load"):
+            df = load_production_data(store_path, file_path)
+    except Exception as e:
+        print(f"Error reading the production data: {e}")
+        return
+    metrics.count("rows", len(df))
+    with metrics.stage("index"):
+        index = build_search_index(df)
+
+    if queries:
+        print(f"Loaded {len(df):,} rows in {time.perf_counter() - start:.2f}s")
+        with metrics.stage("queries"):
+            run_batch(df, index, queries)
+        write_metrics(args.metrics)
+        return
+
+    # Prompt user for multiple employee names and store substrings
+    name_search_list = split_terms(input("Enter employee names (comma-separated, leave blank for all): ").strip())
+    store_search_list = split_terms(input("Enter store substrings (comma-separated, leave blank for all): ").strip())
+    if filter_production(df, index, name_search_list, store_search_list)[0].empty:
+        print("No records found for the given search criteria.")
+        return
+
+    # Prompt the user for sorting preference using numeric choices
+    sort_choice = input("Enter sort order for individual averages:\n1 - Alphabetical (by Employee)\n2 - Pieces/Hr (highest first)\n3 - $/Hr (highest first)\nYour choice: ").strip()
+    with metrics.stage("queries"):
+        run_query(df, index, name_search_list, store_search_list, sort_choice)
+    write_metrics(args.metrics)
+
+def write_metrics(path):
+    metrics.write_summary(path, "Production_By_Account", rates={
+        "queries/sec": ("queries", "queries"),
+        "rows_matched/sec": ("rows_matched", "queries"),
+    })
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,333 @@
+import os
+import numpy as np
+import pandas as pd
+
+# pyarrow is optional: without it the splitter only writes the CSV and everything loads from that
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# Performance metric columns
+metric_columns = ["Pieces/Hr", "$/Hr", "Skus/Hr"]
+
+# Columns stored as categoricals (a few hundred distinct values repeated over every row)
+category_columns = ["Employee", "Store"]
+
+def clean_production_data(df):
+    """
+    Converts the text columns of EmployeeProduction.csv to typed columns: numeric metrics
+    (NaN where blank), datetime Date and categorical Employee/Store. Only the columns
+    present in df are converted.
+    """
+    # Clean and convert performance metric columns to numeric values
+    for column in metric_columns:
+        if column in df:
+            df[column] = pd.to_numeric(
+                df[column].astype(str).str.replace("[\\$,]", "", regex=True), errors="coerce"
+            ).astype("float64")
+    if "Date" in df:
+        df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+    for column in category_columns:
+        if column in df:
+            df[column] = df[column].astype("category")
+    return df
+
+def production_schema():
+    """Arrow schema of the typed production store."""
+    return pa.schema(
+        [("Employee", pa.string()), ("Date", pa.timestamp("ns")), ("Store", pa.string())]
+        + [(column, pa.float64()) for column in metric_columns]
+    )
+
+def open_production_store(path):
+    """Opens a Parquet writer for the typed production store, or returns None if it can't be written."""
+    if not path or pq is None:
+        return None
+    return pq.ParquetWriter(path, production_schema())
+
+def production_table(df):
+    """Converts a typed production frame (see clean_production_data) to an Arrow table."""
+    df = df.copy()
+    for column in category_columns:
+        df[column] = df[column].astype(object)  # Parquet dictionary-encodes the strings itself
+    return pa.Table.from_pandas(df[production_schema().names], schema=production_schema(), preserve_index=False)
+
+def load_production_data(store_path, csv_path, columns=None):
+    """
+    Loads the production data as a compact frame, reading only the given columns: categorical
+    Employee/Store, datetime64 Date and float64 metrics.
+
+    Reads the Parquet store written by Production_Splitter.py when it's available and at
+    least as new as the CSV; otherwise falls back to reading and cleaning the CSV.
+    """
+    store_is_current = (
+        pq is not None
+        and os.path.exists(store_path)
+        and (not os.path.exists(csv_path) or os.path.getmtime(store_path) >= os.path.getmtime(csv_path))
+    )
+    if store_is_current:
+        dictionary_columns = [column for column in category_columns if columns is None or column in columns]
+        df = pd.read_parquet(store_path, columns=columns, read_dictionary=dictionary_columns)
+    else:
+        df = clean_production_data(pd.read_csv(csv_path, usecols=columns))
+    return compact_production_data(df)
+
+def concat_production_data(frames):
+    """
+    Concatenates typed chunks (see clean_production_data) into one frame shaped like
+    load_production_data's, so the data can be handed on without reading it back.
+    """
+    df = pd.concat(frames, ignore_index=True)
+    for column in category_columns:
+        df[column] = df[column].astype("category")  # Chunks with different categories concat to object
+    return compact_production_data(df)
+
+def compact_production_data(df):
+    """Sorts the categories of a loaded frame."""
+    # Keep the categories alphabetical so grouping and sorting order matches plain strings
+    for column in category_columns:
+        if column in df:
+            df[column] = df[column].cat.set_categories(sorted(df[column].cat.categories))
+
+    # The metrics stay float64: float32 rounds the two-decimal values (59.345 becomes
+    # 59.345001...), which flips cent ties in the printed averages
+    return df
+
+def summarize_employees(df):
+    """
+    Computes every employee's positive-only metric averages in a single groupby.
+
+    Blank and zero values are masked to NaN once, so the mean and count skip them the same
+    way `group.loc[group[col] > 0, col].mean()` did. Returns a frame indexed by Employee
+    (alphabetical) with "Avg <metric>" and "<metric> Count" columns, plus "Latest Date"
+    when df has a Date column.
+    """
+    metrics = df[metric_columns].astype("float64")
+    positive = metrics.where(metrics > 0)
+    stats = positive.groupby(df["Employee"], observed=True).agg(["mean", "count"])
+    summary = pd.DataFrame(index=stats.index)
+    for column in metric_columns:
+        summary[f"Avg {column}"] = stats[(column, "mean")]
+    for column in metric_columns:
+        summary[f"{column} Count"] = stats[(column, "count")]
+    if "Date" in df:
+        summary["Latest Date"] = df["Date"].groupby(df["Employee"], observed=True).max()
+    return summary
+
+def grand_averages(summary):
+    """Mean of the employee averages for each metric, keyed by metric column."""
+    return {column: summary[f"Avg {column}"].mean() for column in metric_columns}
+
+def build_value_index(values):
+    """
+    Lookup index over a categorical column's distinct values, so searches match the few
+    hundred distinct names instead of scanning every row's string. Holds the lowercased
+    categories and, per category code, the positions of the rows that have it.
+    """
+    codes = values.cat.codes.to_numpy()
+    order = np.argsort(codes, kind="stable")
+    counts = np.bincount(codes[codes >= 0], minlength=len(values.cat.categories))
+    # Rows with a missing value (code -1) sort first and belong to no category
+    present = order[len(codes) - counts.sum():]
+    return {
+        "names": [str(name).lower() for name in values.cat.categories],
+        "codes": codes,
+        "positions": np.split(present, np.cumsum(counts)[:-1]),
+    }
+
+def match_codes(index, terms):
+    """Category codes whose value contains any of the terms (case-insensitive substrings)."""
+    terms = [term.lower() for term in terms]
+    return np.array(
+        [code for code, name in enumerate(index["names"]) if any(term in name for term in terms)], dtype=np.int64
+    )
+
+def code_positions(index, codes):
+    """Positions, in row order, of the rows having any of the category codes."""
+    if not len(codes):
+        return np.array([], dtype=np.int64)
+    return np.sort(np.concatenate([index["positions"][code] for code in codes]))
+
+# Columns that identify a production row; the history store keeps one row per key
+history_key = ["Employee", "Date", "Store"]
+
+def history_partition(history_dir, month):
+    """Directory of one month ("YYYY-MM") of the history store."""
+    return os.path.join(history_dir, month)
+
+def history_keys(df):
+    """Dedupe keys of typed rows as plain values (missing names and stores become "")."""
+    keys = df[history_key].astype({"Employee": object, "Store": object}).fillna({"Employee": "", "Store": ""})
+    return pd.MultiIndex.from_frame(keys)
+
+def part_number(name):
+    """Sequence number of a partition file ("part-00003.parquet" -> 3)."""
+    return int(name.split("-")[1].split(".")[0])
+
+def partition_parts(partition):
+    """
+    The live Parquet files of a month partition, oldest first: its latest rewrite
+    ("base-NNNNN.parquet", if any) and the parts appended after it. Files older than the
+    latest rewrite are left over from an interrupted one and are ignored.
+    """
+    names = sorted((name for name in os.listdir(partition) if name.endswith(".parquet")), key=part_number)
+    bases = [i for i, name in enumerate(names) if name.startswith("base-")]
+    return names[bases[-1]:] if bases else names
+
+def history_files(history_dir):
+    """Paths of the live Parquet files of every month of the history store."""
+    months = sorted(os.listdir(history_dir)) if os.path.isdir(history_dir) else []
+    return [
+        os.path.join(history_partition(history_dir, month), part)
+        for month in months
+        for part in partition_parts(history_partition(history_dir, month))
+    ]
+
+def write_part(partition, name, df):
+    """Writes typed rows as a partition file, under a temporary name so a crash never leaves a half-written one."""
+    path = os.path.join(partition, name)
+    pq.write_table(production_table(df), path + ".tmp")
+    os.replace(path + ".tmp", path)
+
+def append_history(history_dir, df):
+    """
+    Adds typed production rows (see clean_production_data) to the history store at
+    history_dir, a directory of month partitions each holding Parquet parts.
+
+    Rows are keyed on (Employee, Date, Store) and the latest ingest wins: within df the last
+    row for a key is kept, and a row whose key is already in the store with different
+    values replaces the stored one. New keys are appended as a new part; a month with
+    replaced rows is rewritten as a single "base" part, and its older files are removed.
+    Rows equal to the stored ones are skipped. Only the key columns of the touched months
+    are read unless a key is already stored. Rows without a date can't be placed in a month
+    and are dropped. Returns (rows appended, rows replaced, unchanged rows skipped, rows
+    superseded by a later row for the same key in df, rows without a date).
+    """
+    if pq is None:
+        raise RuntimeError("The history store needs pyarrow")
+
+    undated = int(df["Date"].isna().sum())
+    df = df[df["Date"].notna()]
+    repeated = history_keys(df).duplicated(keep="last")
+    df = df[~repeated]  # Later reports win within a batch
+    appended = replaced = unchanged = 0
+    for month, rows in df.groupby(df["Date"].dt.strftime("%Y-%m")):
+        partition = history_partition(history_dir, month)
+        os.makedirs(partition, exist_ok=True)
+        parts = partition_parts(partition)
+        next_number = part_number(parts[-1]) + 1 if parts else 0
+        stored_keys = pd.MultiIndex.from_tuples([], names=history_key)
+        if parts:
+            stored_keys = history_keys(
+                pd.concat([pd.read_parquet(os.path.join(partition, part), columns=history_key) for part in parts])
+            )
+        overlap = history_keys(rows).isin(stored_keys)
+        appended += int((~overlap).sum())
+        if not overlap.any():
+            write_part(partition, f"part-{next_number:05d}.parquet", rows)
+            continue
+
+        # Compare the overlapping rows' metrics with the stored ones (blanks compare equal)
+        stored = pd.concat([pd.read_parquet(os.path.join(partition, part)) for part in parts], ignore_index=True)
+        stored_values = stored.set_index(stored_keys)[metric_columns]
+        new_values = rows[overlap].set_index(history_keys(rows[overlap]))[metric_columns]
+        old_values = stored_values.loc[new_values.index]
+        same = ((new_values == old_values) | (new_values.isna() & old_values.isna())).all(axis=1).to_numpy()
+        unchanged += int(same.sum())
+        changed = rows[overlap][~same]
+        replaced += len(changed)
+        if changed.empty:
+            if not overlap.all():
+                write_part(partition, f"part-{next_number:05d}.parquet", rows[~overlap])
+            continue
+
+        # Rewrite the month with the changed rows in place of the stored ones. The new base
+        # supersedes the older files as soon as it exists, so they can go afterwards.
+        kept = stored[~stored_keys.isin(history_keys(changed))]
+        added = pd.concat([rows[~overlap], changed]).astype({column: object for column in category_columns})
+        write_part(partition, f"base-{next_number:05d}.parquet", pd.concat([kept, added], ignore_index=True))
+        for part in os.listdir(partition):
+            if part.endswith(".parquet") and part_number(part) < next_number:
+                os.remove(os.path.join(partition, part))
+    return appended, replaced, unchanged, int(repeated.sum()), undated
+
+def load_history(history_dir, columns=None, start=None, end=None):
+    """
+    Loads the history store as a compact frame (see load_production_data), reading only the
+    given columns and only the month partitions between the start and end dates (inclusive,
+    either may be None).
+    """
+    months = sorted(os.listdir(history_dir)) if os.path.isdir(history_dir) else []
+    if start is not None:
+        months = [month for month in months if month >= pd.Timestamp(start).strftime("%Y-%m")]
+    if end is not None:
+        months = [month for month in months if month <= pd.Timestamp(end).strftime("%Y-%m")]
+
+    frames = [
+        pd.read_parquet(os.path.join(history_partition(history_dir, month), part), columns=columns)
+        for month in months
+        for part in partition_parts(history_partition(history_dir, month))
+    ]
+    if frames:
+        df = pd.concat(frames, ignore_index=True)
+    else:
+        df = production_schema().empty_table().to_pandas()
+        df = df[columns] if columns is not None else df
+
+    if "Date" in df:
+        if start is not None:
+            df = df[df["Date"] >= pd.Timestamp(start)]
+        if end is not None:
+            df = df[df["Date"] <= pd.Timestamp(end)]
+        df = df.reset_index(drop=True)
+    for column in category_columns:
+        if column in df:
+            df[column] = df[column].astype("category")
+    return compact_production_data(df)
+
+def window_averages(df, end, windows=(30, 90)):
+    """
+    Positive-only metric averages per employee over trailing windows of days ending at end
+    (inclusive), with the same > 0 rule as summarize_employees, plus each metric's trend.
+
+    The rows are sorted by date once and every window is a slice of that order found by
+    binary search, aggregated with one bincount per metric. Returns a frame indexed by
+    Employee (every category of df) with "<metric> <days>d" columns and "<metric> Trend",
+    the percent change of the shortest window's average against the longest's.
+    """
+    end = pd.Timestamp(end).normalize()
+    dates = df["Date"].to_numpy()
+    order = np.argsort(dates, kind="stable")
+    dates = dates[order]
+    codes = df["Employee"].cat.codes.to_numpy()[order]
+    values = df[metric_columns].to_numpy("float64")[order]
+    positive = values > 0  # NaN compares False, so blanks are left out too
+    stop = np.searchsorted(dates, (end + pd.Timedelta(days=1)).to_datetime64())
+
+    employees = df["Employee"].cat.categories
+    averages = pd.DataFrame(index=pd.Index(employees, name="Employee"))
+    for days in windows:
+        start = np.searchsorted(dates, (end - pd.Timedelta(days=days - 1)).to_datetime64())
+        window_codes = codes[start:stop]
+        keep = window_codes >= 0
+        for i, column in enumerate(metric_columns):
+            counted = positive[start:stop, i] & keep
+            sums = np.bincount(window_codes[counted], weights=values[start:stop, i][counted], minlength=len(employees))
+            counts = np.bincount(window_codes[counted], minlength=len(employees))
+            with np.errstate(invalid="ignore", divide="ignore"):
+                averages[f"{column} {days}d"] = sums / counts
+    short, long = min(windows), max(windows)
+    for column in metric_columns:
+        averages[f"{column} Trend"] = (averages[f"{column} {short}d"] / averages[f"{column} {long}d"] - 1) * 100
+    return averages
+
+def history_window_averages(history_dir, end, windows=(30, 90)):
+    """
+    window_averages over the history store, reading only the month partitions the longest
+    window touches. Returns (averages, latest date in the history store's window).
+    """
+    start = pd.Timestamp(end).normalize() - pd.Timedelta(days=max(windows) - 1)
+    df = load_history(history_dir, columns=["Employee", "Date"] + metric_columns, start=start, end=end)
+    return window_averages(df, end, windows), df["Date"].max()
@@ -0,0 +1,152 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+import Production_By_Account as account
+from Production_Data import load_production_data
+
+# Local report server: keeps the production data loaded and serves the Production_By_Account
+# reports over HTTP, e.g. http://127.0.0.1:8765/report?employees=smith,doe&stores=kroger&sort=2
+host = "127.0.0.1"
+port = 8765
+
+# Number of generated PDFs kept in memory
+cache_size = 64
+
+class ReportCache:
+    """
+    Holds the loaded production data and an LRU cache of generated reports. The data version
+    is the (mtime, size) of the production files; when it changes the data is reloaded and
+    every cached report is dropped.
+    """
+    def __init__(self, max_entries=cache_size):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.reports = OrderedDict()
+        self.version = None
+        self.df = self.index = None
+
+    def data_version(self):
+        """(mtime, size) of the Parquet store and CSV, None for a missing file."""
+        version = []
+        for path in (account.store_path, account.file_path):
+            try:
+                stat = os.stat(path)
+                version.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                version.append(None)
+        return tuple(version)
+
+    def refresh(self):
+        """Reloads the data and clears the cache if the production files changed. Call with the lock held."""
+        version = self.data_version()
+        if version == self.version:
+            return
+        start = time.perf_counter()
+        self.df = load_production_data(account.store_path, account.file_path)
+        self.index = account.build_search_index(self.df)
+        self.reports.clear()
+        self.version = version
+        print(f"Loaded {len(self.df):,} rows in {time.perf_counter() - start:.2f}s")
+
+    def get(self, name_search_list, store_search_list, sort_choice):
+        """
+        Returns (pdf bytes, file name, cache hit) for a normalized query, or None if nothing
+        matched. Misses are rendered and cached, evicting the least recently used report.
+
+        The lock is only held to refresh, look up and insert: misses render outside it from a
+        snapshot of the data, so other requests (cache hits included) don't wait behind them.
+        """
+        key = (tuple(name_search_list), tuple(store_search_list), sort_choice)
+        with self.lock:
+            self.refresh()
+            if key in self.reports:
+                self.reports.move_to_end(key)
+                return (*self.reports[key], True)
+            df, index, version = self.df, self.index, self.version
+
+        report = account.query_report(df, index, name_search_list, store_search_list, sort_choice)
+        if report is None:
+            return None
+        pdf, file_name = report
+        entry = (bytes(pdf.output()), file_name)
+
+        with self.lock:
+            # Don't cache a report rendered from data that was reloaded in the meantime
+            if self.version == version:
+                self.reports[key] = entry
+                self.reports.move_to_end(key)
+                if len(self.reports) > self.max_entries:
+                    self.reports.popitem(last=False)
+        return (*entry, False)
+
+def normalize_query(params):
+    """
+    Turns request parameters into a cache key-ready query: lowercased, de-duplicated and
+    sorted name and store terms, and a valid sort choice (alphabetical by default).
+    """
+    def terms(name):
+        values = ",".join(params.get(name, []))
+        return sorted({term.lower() for term in account.split_terms(values)})
+
+    sort_choice = params.get("sort", ["1"])[-1].strip()
+    if sort_choice not in account.sort_orders:
+        sort_choice = "1"
+    return terms("employees"), terms("stores"), sort_choice
+
+class ReportHandler(BaseHTTPRequestHandler):
+    cache = None  # ReportCache shared by every request, set in main()
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path != "/report":
+            self.send_text(404, "Usage: /report?employees=<names>&stores=<stores>&sort=<1|2|3>\n")
+            return
+
+        start = time.perf_counter()
+        query = normalize_query(parse_qs(url.query))
+        try:
+            report = self.cache.get(*query)
+        except Exception as e:
+            self.send_text(500, f"Error creating the report: {e}\n")
+            return
+        if report is None:
+            self.send_text(404, "No records found for the given search criteria.\n")
+            return
+
+        body, file_name, hit = report
+        self.send_response(200)
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Content-Disposition", f'inline; filename="{file_name}"')
+        self.send_header("X-Cache", "hit" if hit else "miss")
+        self.send_header("X-Render-Time", f"{time.perf_counter() - start:.4f}")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_text(self, status, text):
+        body = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def main():
+    ReportHandler.cache = ReportCache()
+    with ReportHandler.cache.lock:
+        ReportHandler.cache.refresh()
+
+    server = ThreadingHTTPServer((host, port), ReportHandler)
+    print(f"Serving production reports on http://{host}:{port}/report")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
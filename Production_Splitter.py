@@ -1,127 +1,479 @@
-import pdfplumber
 import pandas as pd
 import re
-from datetime import datetime, timedelta
+import os
+import json
+import hashlib
+import sqlite3
+import argparse
+import zipfile
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice, repeat
+from datetime import datetime, timedelta, timezone
+from fpdf import FPDF
+from pdfminer.pdfdocument import PDFDocument
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdfparser import PDFParser
+from pdfminer.pdftypes import resolve1
+from Production_Data import load_production_data, open_production_store, summarize_employees, grand_averages
+from Production_Data import clean_production_data, append_history, production_table, concat_production_data
+from Production_Data import window_averages, history_window_averages
+import Run_Metrics as metrics
+import Pdf_Extraction as pdf_text
+from Report_Tables import format_metric, format_change, format_dates, truncate_column, table_rows, draw_table_rows
 
 # File path
 pdf_path = r"C:\Users\Laptop 122\Desktop\Store Prep\06 Employee Reports\EmployeeProductionByStoreReport.pdf"
 csv_output_path = r"C:\Users\Laptop 122\Desktop\Store Prep\06 Employee Reports\EmployeeProduction.csv"
 
-# Initialize an empty list to hold the extracted data
-data = []
+# Typed columnar copy of the CSV (numeric metrics, real dates) that the reports load directly.
+# Needs pyarrow; without it the reports read the CSV instead.
+store_output_path = r"C:\Users\Laptop 122\Desktop\Store Prep\06 Employee Reports\EmployeeProduction.parquet"
+
+# History of every ingested report, one row per (Employee, Date, Store), partitioned by month
+# (see --ingest)
+history_dir = r"C:\Users\Laptop 122\Desktop\Store Prep\06 Employee Reports\ProductionHistory"
 
-# Redefine parsing with cross-page employee tracking
-last_employee = None  # Tracks the last employee name across pages
+# Report paths
+csv_path = csv_output_path
+store_path = store_output_path
+output_dir = r"C:\Users\Laptop 122\Desktop\Store Prep\06 Employee Reports\EmployeeProductionReports"
+summary_pdf_path = r"C:\Users\Laptop 122\Desktop\Store Prep\06 Employee Reports\ProductionAveragesReport.pdf"
 
-def parse_employee_data_with_carryover(page_text):
-    global last_employee
-    lines = page_text.split("\n")
-    for line in lines:
+# Number of worker processes used for page extraction (None = one per CPU core, 1 = serial)
+extraction_workers = None
+
+# How the per-employee reports are written: "files" (a PDF per employee in output_dir),
+# "combined" (one PDF at combined_report_path with a bookmark per employee) or "archive" (the
+# per-employee PDFs in one zip at report_archive_path)
+employee_report_output = "files"
+combined_report_path = r"C:\Users\Laptop 122\Desktop\Store Prep\06 Employee Reports\EmployeeProductionReports.pdf"
+report_archive_path = r"C:\Users\Laptop 122\Desktop\Store Prep\06 Employee Reports\EmployeeProductionReports.zip"
+
+# Number of worker processes used to render the per-employee PDFs (None = one per CPU core, 1 = serial)
+report_workers = None
+
+# The per-employee reports are only re-rendered when their content changes: this manifest in
+# output_dir records a digest of what each employee's PDF was rendered from
+report_manifest_name = "manifest.json"
+
+# Bump whenever render_employee_report's layout changes so every employee is re-rendered
+report_template_version = 2
+
+# Trailing windows (days) of the recent averages in the reports; the trend compares the
+# shortest window's average against the longest's
+trend_windows = (30, 90)
+
+# Compute the recent averages from the history store (see --ingest) instead of the report data,
+# when the store reaches the report's latest date. The pipeline then also re-runs the reports
+# after an ingest.
+trends_from_history = False
+
+# Page text extraction backend (see Pdf_Extraction.py): "pdfplumber", "pypdf2", "pypdfium2" or
+# "columns", which reads the metrics from their column bands instead of guessing them from the
+# shape of the tokens
+extraction_backend = "pdfplumber"
+
+# Parsed pages are cached here keyed by a hash of each page's content stream, so re-runs on a
+# mostly unchanged report only parse new pages (None disables the cache)
+page_cache_path = r"C:\Users\Laptop 122\Desktop\Store Prep\06 Employee Reports\EmployeeProduction.pagecache.sqlite"
+
+# Bump whenever parse_page changes so previously cached pages are re-parsed
+page_cache_version = 2
+
+# Rows are cleaned and written to the CSV this many at a time, so memory use doesn't grow
+# with the length of the report
+csv_chunk_rows = 5000
+
+# Column order of EmployeeProduction.csv
+production_columns = ["Employee", "Date", "Store", "Pieces/Hr", "$/Hr", "Skus/Hr"]
+
+# Report date and page footer lines
+footer_pattern = re.compile(r"\w+day, \w+ \d{1,2}, \d{4} Page \d+ of \d+")
+
+def parse_page(page_text):
+    """
+    Parses a single page without relying on the pages before it.
+
+    Rows that come before the first employee name on the page belong to whoever the
+    previous page ended on, so they are left with Employee=None and counted in
+    "unresolved". "last_employee" is the last name seen on the page (None if there was none)
+    and "skipped" the number of lines that were neither a name, a footer nor a row.
+
+    Each line is scanned once: cheap checks settle the footer and employee-name tests for
+    ordinary rows, and every token is normalized and classified a single time.
+    """
+    rows = []
+    unresolved = skipped = 0
+    page_employee = None
+    for line in page_text.split("\n"):
         # Skip report date and page footer lines
-        if re.match(r"\w+day, \w+ \d{1,2}, \d{4} Page \d+ of \d+", line):
+        if "day, " in line and footer_pattern.match(line):
             continue
 
-        # Check for an employee name (no date or numeric values)
-        if not any(char.isdigit() for char in line) and line.strip():
-            last_employee = line.strip()  # Update the current employee name
-        else:
-            # Split the line into components
-            parts = line.split()
-            if len(parts) >= 2:
-                try:
-                    date = parts[0]  # First column is the date
-                    store = []
-                    pieces_hr = dollars_hr = skus_hr = ""
-
-                    # Start parsing each part
-                    for part in parts[1:]:
-                        if part.startswith("$") and not dollars_hr:
-                            # Found $/Hr
-                            dollars_hr = part
-                        elif part.replace(",", "").isdigit() and len(part.replace(",", "")) >= 3 and not pieces_hr:
-                            # Found Pieces/Hr
-                            pieces_hr = part
-                        elif part.replace(",", "").isdigit() and not skus_hr:
-                            # Found Skus/Hr
-                            skus_hr = part
-                        else:
-                            # Add to store name
-                            store.append(part)
-
-                    # Combine store back into a single string
-                    store = " ".join(store).strip()
-
-                    # if "PICK #874" in store:
-                    # Check if the store should be excluded
-                    # if store == "PICK #874 +RX, KENOSHA-HWY 338":
-                        # continue  # Skip adding this record to the data list
-
-                    # Append the row to the data
-                    data.append({
-                        "Employee": last_employee,
-                        "Date": date,
-                        "Store": store,
-                        "Pieces/Hr": pieces_hr,
-                        "$/Hr": dollars_hr,
-                        "Skus/Hr": skus_hr,
-                    })
-                except ValueError:
-                    continue
-
-# Extract text from the PDF with cross-page tracking
-with pdfplumber.open(pdf_path) as pdf:
-    for page in pdf.pages:
-        text = page.extract_text()
-        parse_employee_data_with_carryover(text)
-
-# Convert the data to a DataFrame
-df = pd.DataFrame(data)
-
-# Clean and process the DataFrame
-df["Employee"] = df["Employee"].str.replace("Pieces/Hr \\$/Hr Skus/Hr", "", regex=True)
-df["Employee"] = df["Employee"].fillna(method="ffill")  # Carry forward any missing employee names
-
-# Convert the 'Date' column to datetime
-df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-
-# Calculate three-month threshold
-three_months_ago = datetime.now() - timedelta(days=90)
-
-# Identify employees with records within the last three months
-active_employees = df[df["Date"] >= three_months_ago]["Employee"].unique()
-
-# Filter the DataFrame to include only active employees
-df = df[df["Employee"].isin(active_employees)]
-
-# Export to CSV
-df.to_csv(csv_output_path, index=False)
-print(f"Data has been exported to {csv_output_path}")
-
-
-import pandas as pd
-from fpdf import FPDF
-import os
-
-# Paths
-csv_path = r"C:\Users\Laptop 122\Desktop\Store Prep\06 Employee Reports\EmployeeProduction.csv"
-output_dir = r"C:\Users\Laptop 122\Desktop\Store Prep\06 Employee Reports\EmployeeProductionReports"
-
-# Create output directory if it doesn't exist
-os.makedirs(output_dir, exist_ok=True)
+        # Check for an employee name (no date or numeric values). Rows start with a date,
+        # so the full digit scan only runs for lines that don't start with a digit.
+        if not line[:1].isdigit() and not any(char.isdigit() for char in line):
+            name = line.strip()
+            if name:
+                page_employee = name  # Update the current employee name
+            continue
 
-# Load the CSV into a DataFrame
-df = pd.read_csv(csv_path)
+        # Split the line into components
+        parts = line.split()
+        if len(parts) < 2:
+            skipped += 1
+            continue
+        date = parts[0]  # First column is the date
+        store = []
+        pieces_hr = dollars_hr = skus_hr = ""
+
+        # Sort the remaining parts into $/Hr, Pieces/Hr (3+ digits), Skus/Hr and the store name
+        for part in parts[1:]:
+            if part[0] == "$":
+                if not dollars_hr:
+                    dollars_hr = part
+                    continue
+            else:
+                digits = part.replace(",", "")
+                if digits.isdigit():
+                    if len(digits) >= 3 and not pieces_hr:
+                        pieces_hr = part
+                        continue
+                    if not skus_hr:
+                        skus_hr = part
+                        continue
+            store.append(part)
+
+        # if "PICK #874" in store:
+        # Check if the store should be excluded
+        # if store == "PICK #874 +RX, KENOSHA-HWY 338":
+            # continue  # Skip adding this record to the data list
+
+        # Append the row to the page's rows
+        rows.append({
+            "Employee": page_employee,
+            "Date": date,
+            "Store": " ".join(store),
+            "Pieces/Hr": pieces_hr,
+            "$/Hr": dollars_hr,
+            "Skus/Hr": skus_hr,
+        })
+        if page_employee is None:
+            unresolved += 1
+    return {"rows": rows, "unresolved": unresolved, "last_employee": page_employee, "skipped": skipped}
+
+def parse_page_cells(lines):
+    """
+    parse_page for the "columns" backend, whose lines come as (text, column) cells: the metrics
+    are taken from their columns and the date and store from the cells left of them.
+    """
+    rows = []
+    unresolved = skipped = 0
+    page_employee = None
+    for cells in lines:
+        line = " ".join(text for text, _ in cells)
+        if "day, " in line and footer_pattern.match(line):
+            continue
+        if not any(char.isdigit() for char in line):
+            name = line.strip()
+            if name:
+                page_employee = name
+            continue
 
-# Clean and convert columns to numeric
-df["Pieces/Hr"] = pd.to_numeric(df["Pieces/Hr"].str.replace(",", "", regex=True), errors="coerce").fillna(0)
-df["$/Hr"] = pd.to_numeric(df["$/Hr"].str.replace("[\$,]", "", regex=True), errors="coerce").fillna(0)
-df["Skus/Hr"] = pd.to_numeric(df["Skus/Hr"].astype(str).str.replace(",", "", regex=True), errors="coerce").fillna(0)
+        parts = " ".join(text for text, column in cells if column is None).split()
+        columns = {column: text for text, column in reversed(cells) if column is not None}
+        if not parts or len(parts) + len(columns) < 2:
+            skipped += 1
+            continue
+        rows.append({
+            "Employee": page_employee,
+            "Date": parts[0],
+            "Store": " ".join(parts[1:]),
+            "Pieces/Hr": columns.get("Pieces/Hr", ""),
+            "$/Hr": columns.get("$/Hr", ""),
+            "Skus/Hr": columns.get("Skus/Hr", ""),
+        })
+        if page_employee is None:
+            unresolved += 1
+    return {"rows": rows, "unresolved": unresolved, "last_employee": page_employee, "skipped": skipped}
+
+def resolve_page(page, carry):
+    """
+    Fills in a parsed page's unresolved leading rows with the employee carried over from
+    the previous page. Returns the page's rows and the employee to carry into the next page.
+    """
+    leading = [dict(row, Employee=carry) for row in page["rows"][:page["unresolved"]]]
+    rows = leading + page["rows"][page["unresolved"]:]
+    if page["last_employee"] is not None:
+        carry = page["last_employee"]
+    return rows, carry
+
+def parse_employee_data_with_carryover(pages):
+    """Yields the rows of the parsed pages in order, carrying the last employee name across page boundaries."""
+    last_employee = None  # Tracks the last employee name across pages
+    for page in pages:
+        rows, last_employee = resolve_page(page, last_employee)
+        metrics.count("rows", len(rows))
+        metrics.count("lines_skipped", page["skipped"])
+        yield from rows
+
+# Report date / page number text as it appears in a content stream. The parser skips the footer,
+# so it is left out of the page hash; otherwise a longer report ("Page 3 of 812" instead of
+# "Page 3 of 790") or a new run date would change every page's hash.
+footer_stream_pattern = re.compile(rb"\w+day, \w+ \d{1,2}, \d{4}|Page \d+ of \d+")
+
+def page_content_hash(page, backend):
+    """
+    Hashes a page's raw content stream(s), which is much cheaper than extracting its text.
+    The extraction backend is hashed in too, so each backend's parsed pages are cached apart.
+    """
+    digest = hashlib.sha1(backend.encode("utf-8"))
+    for stream in page.contents:
+        digest.update(footer_stream_pattern.sub(b"", resolve1(stream).get_data()))
+    return digest.hexdigest()
+
+def page_hashes(path, backend):
+    """
+    Content hashes (see page_content_hash) of every page of the PDF, in page order. pdfminer's
+    object cache is turned off, so decoded content streams aren't kept and memory doesn't
+    grow with the length of the report.
+    """
+    with open(path, "rb") as file:
+        document = PDFDocument(PDFParser(file), caching=False)
+        return [page_content_hash(page, backend) for page in PDFPage.create_pages(document)]
+
+def open_page_cache(path):
+    """Opens (creating it if needed) the SQLite page cache, or returns None when the cache is disabled."""
+    if not path:
+        return None
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE IF NOT EXISTS pages (hash TEXT PRIMARY KEY, version INTEGER, page TEXT)")
+    return connection
+
+def parse_pages(path, page_indexes, backend, bands=None):
+    """
+    Extracts the given (0-based, ascending) pages of the PDF with the extraction backend and
+    yields them parsed, in page order. bands are the column bands of the "columns" backend.
+    """
+    if backend == "columns":
+        pages, parse = pdf_text.page_cells(path, page_indexes, bands), parse_page_cells
+    else:
+        pages, parse = pdf_text.page_texts(path, page_indexes, backend), parse_page
+    while True:
+        with metrics.stage("extract_text"):
+            page = next(pages, None)
+        if page is None:
+            return
+        with metrics.stage("parse"):
+            parsed = parse(page)
+        yield parsed
+
+def parse_page_batch(path, page_indexes, backend, bands):
+    """Worker for parallel extraction (see pdf_text.parse_pages_parallel): parse_pages as a list."""
+    return list(parse_pages(path, page_indexes, backend, bands))
+
+def extract_pages(path, workers=None, prune_cache=True):
+    """
+    Yields the parsed result of every page of the PDF in page order.
+
+    Pages whose content hash is already in the page cache are served from it; only new or
+    changed pages are extracted and parsed (across a process pool unless workers == 1) with
+    the extraction_backend. With prune_cache, the cache is then cut down to this report's
+    pages; ingests leave it alone so they don't evict the main report's pages (or each
+    other's).
+    """
+    # The columns backend needs the report's column bands; without them it reads the text
+    backend, bands = extraction_backend, None
+    if backend == "columns":
+        bands = pdf_text.find_column_bands(path)
+        if bands is None:
+            print("No Pieces/Hr $/Hr Skus/Hr column header found; reading the report as text")
+            backend = "pypdfium2"
+
+    cache = open_page_cache(page_cache_path)
+    cached = set()
+    if cache is not None:
+        cached = {row[0] for row in cache.execute("SELECT hash FROM pages WHERE version = ?", (page_cache_version,))}
+
+    with metrics.stage("page_hash"):
+        hashes = page_hashes(path, backend)
+    missing = [i for i, page_hash in enumerate(hashes) if page_hash not in cached]
+    print(f"{len(hashes) - len(missing)} of {len(hashes)} pages served from the page cache")
+    metrics.count("pages", len(hashes))
+    metrics.count("pages_cached", len(hashes) - len(missing))
+
+    if workers == 1:
+        parsed = parse_pages(path, missing, backend, bands)
+    else:
+        parsed = pdf_text.parse_pages_parallel(parse_page_batch, path, missing, workers, backend, bands)
+
+    # Missing pages come back in page order, so each one is simply the next parsed result
+    missing = set(missing)
+    for i, page_hash in enumerate(hashes):
+        if i not in missing:
+            (page_json,) = cache.execute("SELECT page FROM pages WHERE hash = ?", (page_hash,)).fetchone()
+            yield json.loads(page_json)
+            continue
+        page = next(parsed)
+        if cache is not None:
+            cache.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?)",
+                (page_hash, page_cache_version, json.dumps(page)),
+            )
+        yield page
+
+    if cache is not None:
+        if prune_cache:
+            # Only keep this report's pages so the cache doesn't grow without bound
+            cache.execute("CREATE TEMP TABLE current_pages (hash TEXT PRIMARY KEY)")
+            cache.executemany("INSERT OR IGNORE INTO current_pages VALUES (?)", ((page_hash,) for page_hash in hashes))
+            cache.execute("DELETE FROM pages WHERE hash NOT IN (SELECT hash FROM current_pages)")
+        cache.commit()
+        cache.close()
+
+def iter_chunks(rows, size):
+    """Groups an iterable of rows into lists of up to size rows."""
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+def iter_clean_chunks(rows):
+    """
+    Groups parsed rows into DataFrames of up to csv_chunk_rows rows with the employee names
+    cleaned and carried forward (across chunks too). Dates and metrics are still text.
+    """
+    carry_employee = None
+    for chunk in iter_chunks(rows, csv_chunk_rows):
+        df = pd.DataFrame(chunk, columns=production_columns)
+
+        # Clean and process the chunk
+        df["Employee"] = df["Employee"].str.replace("Pieces/Hr \\$/Hr Skus/Hr", "", regex=True)
+        df["Employee"] = df["Employee"].ffill()  # Carry forward any missing employee names
+        if carry_employee is not None:
+            df["Employee"] = df["Employee"].fillna(carry_employee)  # ...including from the previous chunk
+        if pd.notna(df["Employee"].iloc[-1]):
+            carry_employee = df["Employee"].iloc[-1]
+        yield df
+
+def write_production_csv(rows, path, store_path=None, collect=False):
+    """
+    Cleans the rows and writes those of employees active in the last three months to path,
+    csv_chunk_rows at a time, and to the typed Parquet store at store_path if given. With
+    collect, also returns the written rows as the frame load_production_data would load.
+
+    The first pass cleans each chunk and appends it to a staging file while keeping a small
+    per-employee "last seen date" index; the second pass streams the staging file back and
+    keeps only the rows of employees seen within the last 90 days.
+
+    Only the staging file (path + ".partial") is written as pages are parsed, a chunk at a
+    time from the first csv_chunk_rows rows on. Nothing is written to path until the whole
+    report has been parsed: an employee's later rows can still make them active, so no row
+    is known to be kept before then.
+    """
+    staging_path = path + ".partial"
+    last_seen = {}
+    first_chunk = True
+    for df in iter_clean_chunks(rows):
+        with metrics.stage("clean"):
+            # Convert the 'Date' column to datetime
+            df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+            if metrics.enabled:
+                metrics.count("unparseable_dates", int(df["Date"].isna().sum()))
+
+            # Remember the latest date each employee was seen (missing names are written as "")
+            for employee, seen in df.groupby(df["Employee"].fillna(""))["Date"].max().items():
+                if pd.notna(seen) and (employee not in last_seen or seen > last_seen[employee]):
+                    last_seen[employee] = seen
+
+        with metrics.stage("write_staging"):
+            df.to_csv(staging_path, mode="w" if first_chunk else "a", header=first_chunk, index=False)
+        first_chunk = False
+
+    if first_chunk:
+        # No rows at all: still leave a CSV with just the header behind
+        pd.DataFrame(columns=production_columns).to_csv(staging_path, index=False)
+
+    # Calculate three-month threshold
+    three_months_ago = datetime.now() - timedelta(days=90)
+
+    # Identify employees with records within the last three months
+    active_employees = [employee for employee, seen in last_seen.items() if seen >= three_months_ago]
+
+    # Filter the staged rows to include only active employees. Everything is read back as
+    # text so the values are written out exactly as they were staged.
+    store = open_production_store(store_path)
+    typed_chunks = []
+    first_chunk = True
+    with metrics.stage("active_filter"):
+        for df in pd.read_csv(staging_path, dtype=str, keep_default_na=False, chunksize=csv_chunk_rows):
+            active = df[df["Employee"].isin(active_employees)]
+            metrics.count("rows_written", len(active))
+            metrics.count("rows_inactive", len(df) - len(active))
+            active.to_csv(path, mode="w" if first_chunk else "a", header=first_chunk, index=False)
+            if store is not None or collect:
+                typed = clean_production_data(active.copy())
+                if store is not None:
+                    store.write_table(production_table(typed))
+                if collect:
+                    typed_chunks.append(typed)
+            first_chunk = False
+    if store is not None:
+        store.close()
+        metrics.file_written(store_path)
+    os.remove(staging_path)
+    metrics.file_written(path)
+
+    if collect:
+        if not typed_chunks:
+            typed_chunks.append(clean_production_data(pd.DataFrame(columns=production_columns)))
+        return concat_production_data(typed_chunks)
+    return None
+
+def extract_production_data(collect=False):
+    """Extracts the report into the CSV and Parquet store; with collect, also returns the exported frame."""
+    # Extract text from the PDF with cross-page tracking; pages are parsed independently
+    # (in parallel unless extraction_workers == 1), stitched back together in order and
+    # streamed straight into the CSV
+    pages = extract_pages(pdf_path, extraction_workers)
+    df = write_production_csv(parse_employee_data_with_carryover(pages), csv_output_path, store_output_path, collect)
+    print(f"Data has been exported to {csv_output_path}")
+    return df
+
+def ingest_reports(paths):
+    """
+    Parses any number of EmployeeProductionByStoreReport PDFs (overlapping date ranges are
+    fine) into the history store in history_dir. Later reports win when the same
+    (Employee, Date, Store) appears in more than one, in this ingest or an earlier one.
+    """
+    chunks = [pd.DataFrame(columns=production_columns)]
+    for path in paths:
+        pages = extract_pages(path, extraction_workers, prune_cache=False)
+        report_chunks = list(iter_clean_chunks(parse_employee_data_with_carryover(pages)))
+        print(f"{sum(len(chunk) for chunk in report_chunks)} rows parsed from {path}")
+        chunks.extend(report_chunks)
+
+    df = clean_production_data(pd.concat(chunks, ignore_index=True))
+    with metrics.stage("append_history"):
+        appended, replaced, unchanged, repeated, undated = append_history(history_dir, df)
+    metrics.count("rows_appended", appended)
+    metrics.count("rows_replaced", replaced)
+    metrics.count("rows_unchanged", unchanged)
+    metrics.count("rows_repeated", repeated)
+    metrics.count("rows_undated", undated)
+    print(
+        f"{appended} new rows added to {history_dir}, {replaced} replaced with newer values "
+        f"({unchanged} already there unchanged, {repeated} repeated in a later report or row "
+        f"and skipped, {undated} without a date skipped)"
+    )
 
-# Group data by employee
-grouped = df.groupby("Employee")
 
 # Define a function to create PDF
-class PDF(FPDF):
+class EmployeePDF(FPDF):
+    # Page the current employee's report starts on, so page numbers restart per employee
+    # in the combined report
+    first_page = 1
+
     def header(self):
         self.set_font("Arial", "B", 14)
         self.cell(0, 10, "Employee Performance Report", align="C", ln=True)
@@ -130,26 +482,42 @@ class PDF(FPDF):
     def footer(self):
         self.set_y(-15)
         self.set_font("Arial", "I", 8)
-        self.cell(0, 10, f"Page {self.page_no()}", align="C")
+        self.cell(0, 10, f"Page {self.page_no() - self.first_page + 1}", align="C")
+
+def report_creation_date(latest):
+    """
+    The creation date for a report whose latest production date is latest. Documents are dated
+    by their data instead of the clock, so the same rows always render to the same bytes.
+    """
+    if pd.notna(latest):
+        return latest.to_pydatetime().replace(tzinfo=timezone.utc)
+    return datetime(2000, 1, 1, tzinfo=timezone.utc)
+
+def render_employee_report(employee, rows, averages, recent, latest, output_dir=None):
+    """
+    Renders one employee's report to <output_dir>/<employee>.pdf and returns the file path
+    (without output_dir, returns the PDF's bytes). rows are the employee's preformatted table
+    rows, averages their (Pieces/Hr, $/Hr, Skus/Hr) positive-only averages, recent their
+    preformatted (metric, short window, long window, trend) rows and latest their latest
+    production date.
+    """
+    pdf = EmployeePDF()
+    pdf.set_creation_date(report_creation_date(latest))
+    draw_employee_report(pdf, employee, rows, averages, recent)
+    if output_dir is None:
+        return bytes(pdf.output())
 
-    def truncate_text(self, text, max_length=30):
-        """Truncates text to a maximum length, adding ellipsis if necessary."""
-        if len(text) > max_length:
-            return text[:max_length - 3] + "..."
-        return text
-
-    def add_table_row(self, col1, col2, col3, col4, col5):
-        self.set_font("Arial", size=10)
-        self.cell(30, 10, col1, border=1, align="C")
-        self.cell(70, 10, col2, border=1, align="L")
-        self.cell(30, 10, col3, border=1, align="C")
-        self.cell(30, 10, col4, border=1, align="C")
-        self.cell(30, 10, col5, border=1, align="C")
-        self.ln()
-
-for employee, group in grouped:
-    pdf = PDF()
-    pdf.add_page()
+    # Save PDF for this employee
+    pdf_file_path = employee_report_path(employee, output_dir)
+    pdf.output(pdf_file_path)
+    return pdf_file_path
+
+def draw_employee_report(pdf, employee, rows, averages, recent, bookmark=False):
+    """Adds one employee's report to pdf from a new page, with an outline entry if bookmark is set."""
+    pdf.add_page()  # Draws the previous employee's last footer
+    pdf.first_page = pdf.page_no()
+    if bookmark:
+        pdf.start_section(employee)
 
     # Title for the employee
     pdf.set_font("Arial", "B", 12)
@@ -167,22 +535,10 @@ for employee, group in grouped:
 
     # Add table rows
     pdf.set_font("Arial", size=10)
-    for index, row in group.iterrows():
-        store = pdf.truncate_text(row["Store"], max_length=30)  # Truncate the Store column
-        pdf.add_table_row(
-            row["Date"],
-            store,
-            f"{row['Pieces/Hr']:.2f}" if row["Pieces/Hr"] > 0 else "N/A",
-            f"{row['$/Hr']:.2f}" if row["$/Hr"] > 0 else "N/A",
-            f"{row['Skus/Hr']:.2f}" if row["Skus/Hr"] > 0 else "N/A",
-        )
-
-    # Filter out blank/0 values before calculating averages
-    avg_pieces = group.loc[group["Pieces/Hr"] > 0, "Pieces/Hr"].mean()
-    avg_dollars = group.loc[group["$/Hr"] > 0, "$/Hr"].mean()
-    avg_skus = group.loc[group["Skus/Hr"] > 0, "Skus/Hr"].mean()
+    draw_table_rows(pdf, [30, 70, 30, 30, 30], ["C", "L", "C", "C", "C"], rows)
 
-    # Add averages section
+    # Add averages section (blank/0 values were left out of the averages)
+    avg_pieces, avg_dollars, avg_skus = averages
     pdf.ln(10)
     pdf.set_font("Arial", "B", 12)
     pdf.cell(0, 10, "Overall Averages", ln=True)
@@ -191,59 +547,186 @@ for employee, group in grouped:
     pdf.cell(0, 10, f"$/Hr: {avg_dollars:.2f}" if pd.notna(avg_dollars) else "$/Hr: No Data", ln=True)
     pdf.cell(0, 10, f"Skus/Hr: {avg_skus:.2f}" if pd.notna(avg_skus) else "Skus/Hr: No Data", ln=True)
 
-    # Save PDF for this employee
-    pdf_file_path = os.path.join(output_dir, f"{employee.replace(' ', '_')}.pdf")
-    pdf.output(pdf_file_path)
-
-print(f"PDFs created in {output_dir}")
-
-import pandas as pd
-from fpdf import FPDF
-import os
-
-# Paths
-csv_path = r"C:\Users\Laptop 122\Desktop\Store Prep\06 Employee Reports\EmployeeProduction.csv"
-summary_pdf_path = r"C:\Users\Laptop 122\Desktop\Store Prep\06 Employee Reports\ProductionAveragesReport.pdf"
-
-# Load the CSV into a DataFrame
-df = pd.read_csv(csv_path)
-
-# Clean and convert columns to numeric
-df["Pieces/Hr"] = pd.to_numeric(df["Pieces/Hr"].str.replace(",", "", regex=True), errors="coerce").fillna(0)
-df["$/Hr"] = pd.to_numeric(df["$/Hr"].str.replace("[\$,]", "", regex=True), errors="coerce").fillna(0)
-df["Skus/Hr"] = pd.to_numeric(df["Skus/Hr"].astype(str).str.replace(",", "", regex=True), errors="coerce").fillna(0)
-
-# Calculate cumulative averages for each employee
-grouped = df.groupby("Employee")
-employee_averages = []
-
-for employee, group in grouped:
-    avg_pieces = group.loc[group["Pieces/Hr"] > 0, "Pieces/Hr"].mean()
-    avg_dollars = group.loc[group["$/Hr"] > 0, "$/Hr"].mean()
-    avg_skus = group.loc[group["Skus/Hr"] > 0, "Skus/Hr"].mean()
-    if pd.notna(avg_pieces) or pd.notna(avg_dollars) or pd.notna(avg_skus):
-        employee_averages.append({
-            "Employee": employee,
-            "Avg Pieces/Hr": avg_pieces,
-            "Avg $/Hr": avg_dollars,
-            "Avg Skus/Hr": avg_skus,
-        })
-
-# Convert to DataFrame
-averages_df = pd.DataFrame(employee_averages)
-
-# Calculate grand averages
-grand_avg_pieces = averages_df["Avg Pieces/Hr"].mean()
-grand_avg_dollars = averages_df["Avg $/Hr"].mean()
-grand_avg_skus = averages_df["Avg Skus/Hr"].mean()
-
-
-# Sort employees by cumulative averages
-averages_df["Cumulative Avg"] = averages_df[["Avg Pieces/Hr", "Avg $/Hr", "Avg Skus/Hr"]].mean(axis=1, skipna=True)
-averages_df = averages_df.sort_values(by="Cumulative Avg", ascending=False)
+    # Add the recent averages and their trend
+    short, long = min(trend_windows), max(trend_windows)
+    pdf.ln(10)
+    pdf.set_font("Arial", "B", 12)
+    pdf.cell(0, 10, "Recent Averages", ln=True)
+    pdf.set_font("Arial", "B", 10)
+    pdf.cell(40, 10, "Metric", border=1, align="C")
+    pdf.cell(40, 10, f"Last {short} Days", border=1, align="C")
+    pdf.cell(40, 10, f"Last {long} Days", border=1, align="C")
+    pdf.cell(40, 10, "Trend", border=1, align="C")
+    pdf.ln()
+    pdf.set_font("Arial", size=10)
+    draw_table_rows(pdf, [40, 40, 40, 40], ["L", "C", "C", "C"], recent)
+
+def render_combined_report(reports, path):
+    """
+    Renders every employee's report into one PDF at path, each from a new page with a
+    bookmark of its own. reports are the render_employee_report columns (employees, rows,
+    averages, recent, latest); the document shares one font and header setup.
+    """
+    employees, rows, averages, recent, latest = reports
+    pdf = EmployeePDF()
+    pdf.set_creation_date(report_creation_date(pd.Series(latest, dtype="datetime64[ns]").max()))
+    for report in zip(employees, rows, averages, recent):
+        draw_employee_report(pdf, *report, bookmark=True)
+    pdf.output(path)
+
+def write_report_archive(reports, path):
+    """
+    Writes every employee's report into one zip at path as <employee>.pdf entries, each
+    streamed into the archive as it is rendered (across the report workers).
+    """
+    # PDF streams are already compressed, so the entries are stored as they are
+    with zipfile.ZipFile(path + ".tmp", "w", zipfile.ZIP_STORED) as archive:
+        with ProcessPoolExecutor(max_workers=report_workers) if report_workers != 1 else nullcontext() as executor:
+            documents = executor.map(render_employee_report, *reports, chunksize=8) if executor else map(render_employee_report, *reports)
+            for employee, document in zip(reports[0], documents):
+                archive.writestr(os.path.basename(employee_report_path(employee, "")), document)
+    os.replace(path + ".tmp", path)
+
+def employee_reports_path():
+    """Where create_employee_reports writes for the current employee_report_output."""
+    return {"files": output_dir, "combined": combined_report_path, "archive": report_archive_path}[employee_report_output]
+
+def employee_report_path(employee, output_dir):
+    return os.path.join(output_dir, f"{employee.replace(' ', '_')}.pdf")
+
+def employee_report_digest(rows, averages, recent, latest):
+    """Digest of everything an employee's PDF is rendered from (see render_employee_report)."""
+    return hashlib.sha1(repr((rows, averages, recent, str(latest))).encode("utf-8")).hexdigest()
+
+def load_report_manifest(path):
+    """The {"template_version", "employees": {employee: digest}} manifest of the last run, or an empty one."""
+    try:
+        with open(path, encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {"template_version": None, "employees": {}}
+
+def save_report_manifest(path, digests):
+    with open(path + ".tmp", "w", encoding="utf-8") as file:
+        json.dump({"template_version": report_template_version, "employees": digests}, file, indent=2)
+    os.replace(path + ".tmp", path)
+
+def load_report_data(df=None):
+    """
+    Loads the typed production data for the report stages (or takes an already loaded
+    frame, which is left as it is); blank metrics count as 0.
+    """
+    df = load_production_data(store_path, csv_path) if df is None else df.copy()
+    df[["Pieces/Hr", "$/Hr", "Skus/Hr"]] = df[["Pieces/Hr", "$/Hr", "Skus/Hr"]].fillna(0)
+    return df
+
+def employee_trends(df):
+    """
+    Every employee's positive-only averages over the trend_windows ending at the latest
+    production date in df, and their trends (see window_averages), computed from df. With
+    trends_from_history set they come from the history store instead when it is up to date
+    with df.
+    """
+    end = df["Date"].max()
+    if pd.isna(end):
+        end = pd.Timestamp.today()
+    if trends_from_history and os.path.isdir(history_dir):
+        trends, latest = history_window_averages(history_dir, end, trend_windows)
+        if pd.notna(latest) and latest >= end.normalize():
+            return trends
+    return window_averages(df, end, trend_windows)
+
+def summarize_report_data(df):
+    """summarize_employees(df) with the columns of employee_trends(df) joined on."""
+    summary = summarize_employees(df)
+    return summary.join(employee_trends(df))
+
+def create_employee_reports(df, summary):
+    """
+    Writes a PDF per employee; summary is summarize_report_data(df). Only employees whose
+    report content changed since the last run (see report_manifest_name) are rendered, and
+    the PDFs of employees no longer in the data are deleted. With employee_report_output set
+    to "combined" or "archive", every employee is written into the one file instead.
+    """
+
+    # Format and truncate the table columns for every employee at once
+    table = pd.DataFrame({
+        "Date": format_dates(df["Date"]),
+        "Store": truncate_column(df["Store"], 30),  # Truncate the Store column
+        "Pieces/Hr": format_metric(df["Pieces/Hr"], positive_only=True),
+        "$/Hr": format_metric(df["$/Hr"], positive_only=True),
+        "Skus/Hr": format_metric(df["Skus/Hr"], positive_only=True),
+    })
+
+    # Group the formatted rows by employee; summary has the same (alphabetical) employee order
+    employees = summary.index.tolist()
+    rows = [table_rows(*(column for _, column in group.items())) for _, group in table.groupby(df["Employee"], observed=True)]
+    averages = table_rows(summary["Avg Pieces/Hr"], summary["Avg $/Hr"], summary["Avg Skus/Hr"])
+    latest = summary["Latest Date"].tolist()
+    short, long = min(trend_windows), max(trend_windows)
+    windows = [
+        table_rows(
+            format_metric(summary[f"{column} {short}d"]),
+            format_metric(summary[f"{column} {long}d"]),
+            format_change(summary[f"{column} Trend"]),
+        )
+        for column in ("Pieces/Hr", "$/Hr", "Skus/Hr")
+    ]
+    recent = [
+        [(column, *window[i]) for column, window in zip(("Pieces/Hr", "$/Hr", "Skus/Hr"), windows)]
+        for i in range(len(employees))
+    ]
+
+    if employee_report_output != "files":
+        path = employee_reports_path()
+        if employee_report_output == "combined":
+            render_combined_report([employees, rows, averages, recent, latest], path)
+        else:
+            write_report_archive([employees, rows, averages, recent, latest], path)
+        metrics.file_written(path)
+        metrics.count("employee_reports_rendered", len(employees))
+        print(f"{len(employees)} employee reports written to {path}")
+        return
+
+    # Create output directory if it doesn't exist
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Compare against the last run's manifest; a new template version re-renders everyone
+    manifest_path = os.path.join(output_dir, report_manifest_name)
+    manifest = load_report_manifest(manifest_path)
+    previous = manifest["employees"] if manifest["template_version"] == report_template_version else {}
+    digests = {employee: employee_report_digest(*report) for employee, *report in zip(employees, rows, averages, recent, latest)}
+    changed = [
+        i for i, employee in enumerate(employees)
+        if previous.get(employee) != digests[employee] or not os.path.exists(employee_report_path(employee, output_dir))
+    ]
+    reports = [[column[i] for i in changed] for column in (employees, rows, averages, recent, latest)]
+
+    if report_workers == 1:
+        for report in zip(*reports):
+            metrics.file_written(render_employee_report(*report, output_dir))
+    elif changed:
+        # Every employee's PDF is independent, so hand the groups to a bounded pool of workers
+        with ProcessPoolExecutor(max_workers=report_workers) as executor:
+            # Iterating the results re-raises any error from a worker
+            for pdf_file_path in executor.map(render_employee_report, *reports, repeat(output_dir), chunksize=8):
+                metrics.file_written(pdf_file_path)
+
+    # Remove the reports of employees who dropped out of the active set
+    dropped = [employee for employee in manifest["employees"] if employee not in digests]
+    for employee in dropped:
+        pdf_file_path = employee_report_path(employee, output_dir)
+        if os.path.exists(pdf_file_path):
+            os.remove(pdf_file_path)
+    save_report_manifest(manifest_path, digests)
+
+    metrics.count("employee_reports_rendered", len(changed))
+    metrics.count("employee_reports_unchanged", len(employees) - len(changed))
+    metrics.count("employee_reports_deleted", len(dropped))
+    print(f"{len(changed)} of {len(employees)} employee PDFs updated in {output_dir} ({len(dropped)} removed)")
 
 # Create Summary PDF
-class PDF(FPDF):
+class SummaryPDF(FPDF):
     def header(self):
         self.set_font("Arial", "B", 14)
         self.cell(0, 10, "Employee Performance Summary", align="C", ln=True)
@@ -254,74 +737,129 @@ class PDF(FPDF):
         self.set_font("Arial", "I", 8)
         self.cell(0, 10, f"Page {self.page_no()}", align="C")
 
-    def add_summary_row(self, employee, pieces, dollars, skus, grand_avg_pieces, grand_avg_dollars, grand_avg_skus):
-        self.set_font("Arial", size=10)
-        
-        # Employee name
-        self.cell(70, 10, employee, border=1, align="L")
-
-        # Pieces/Hr
-        if pd.notna(pieces) and pieces < grand_avg_pieces:
-            self.set_text_color(255, 0, 0)  # Red
-            self.set_font("Arial", "BU", 10)  # Bold and Underline
-        self.cell(40, 10, f"{pieces:.2f}" if pd.notna(pieces) else "N/A", border=1, align="C")
-        self.set_text_color(0, 0, 0)  # Reset to black
-        self.set_font("Arial", size=10)  # Reset to normal font
-
-        # $/Hr
-        if pd.notna(dollars) and dollars < grand_avg_dollars:
-            self.set_text_color(255, 0, 0)  # Red
-            self.set_font("Arial", "BU", 10)  # Bold and Underline
-        self.cell(40, 10, f"{dollars:.2f}" if pd.notna(dollars) else "N/A", border=1, align="C")
-        self.set_text_color(0, 0, 0)  # Reset to black
-        self.set_font("Arial", size=10)  # Reset to normal font
-
-        # Skus/Hr
-        if pd.notna(skus) and skus < grand_avg_skus:
-            self.set_text_color(255, 0, 0)  # Red
-            self.set_font("Arial", "BU", 10)  # Bold and Underline
-        self.cell(40, 10, f"{skus:.2f}" if pd.notna(skus) else "N/A", border=1, align="C")
-        self.set_text_color(0, 0, 0)  # Reset to black
-        self.set_font("Arial", size=10)  # Reset to normal font
-
-        self.ln()
-
-
-
-pdf = PDF()
-pdf.add_page()
-
-# Add table header
-pdf.set_font("Arial", "B", 10)
-pdf.cell(70, 10, "Employee", border=1, align="C")
-pdf.cell(40, 10, "Avg Pieces/Hr", border=1, align="C")
-pdf.cell(40, 10, "Avg $/Hr", border=1, align="C")
-pdf.cell(40, 10, "Avg Skus/Hr", border=1, align="C")
-pdf.ln()
-
-# Add employee rows
-for _, row in averages_df.iterrows():
-    pdf.add_summary_row(
-        employee=row["Employee"],
-        pieces=row["Avg Pieces/Hr"],
-        dollars=row["Avg $/Hr"],
-        skus=row["Avg Skus/Hr"],
-        grand_avg_pieces=grand_avg_pieces,
-        grand_avg_dollars=grand_avg_dollars,
-        grand_avg_skus=grand_avg_skus,
+def create_summary_report(summary):
+    """Writes the Employee Performance Summary PDF from summarize_report_data() output."""
+    # Keep employees that have at least one average
+    averages_df = summary.loc[summary[["Avg Pieces/Hr", "Avg $/Hr", "Avg Skus/Hr"]].notna().any(axis=1)]
+    averages_df = averages_df.rename_axis("Employee").reset_index()
+
+    # Calculate grand averages
+    grand = grand_averages(averages_df)
+    grand_avg_pieces = grand["Pieces/Hr"]
+    grand_avg_dollars = grand["$/Hr"]
+    grand_avg_skus = grand["Skus/Hr"]
+
+
+    # Sort employees by cumulative averages
+    averages_df["Cumulative Avg"] = averages_df[["Avg Pieces/Hr", "Avg $/Hr", "Avg Skus/Hr"]].mean(axis=1, skipna=True)
+    averages_df = averages_df.sort_values(by="Cumulative Avg", ascending=False)
+
+    pdf = SummaryPDF()
+    pdf.add_page()
+
+    # Add table header
+    pdf.set_font("Arial", "B", 10)
+    pdf.cell(70, 10, "Employee", border=1, align="C")
+    pdf.cell(40, 10, "Avg Pieces/Hr", border=1, align="C")
+    pdf.cell(40, 10, "Avg $/Hr", border=1, align="C")
+    pdf.cell(40, 10, "Avg Skus/Hr", border=1, align="C")
+    pdf.ln()
+
+    # Add employee rows, highlighting averages below the grand average
+    rows = table_rows(
+        averages_df["Employee"].astype(str),
+        format_metric(averages_df["Avg Pieces/Hr"]),
+        format_metric(averages_df["Avg $/Hr"]),
+        format_metric(averages_df["Avg Skus/Hr"]),
     )
+    highlights = table_rows(
+        pd.Series(False, index=averages_df.index),
+        averages_df["Avg Pieces/Hr"] < grand_avg_pieces,
+        averages_df["Avg $/Hr"] < grand_avg_dollars,
+        averages_df["Avg Skus/Hr"] < grand_avg_skus,
+    )
+    pdf.set_font("Arial", size=10)
+    draw_table_rows(pdf, [70, 40, 40, 40], ["L", "C", "C", "C"], rows, highlights)
 
 
 
-# Add grand averages at the bottom
-pdf.ln(10)
-pdf.set_font("Arial", "B", 12)
-pdf.cell(0, 10, "Grand Averages", ln=True)
-pdf.set_font("Arial", size=10)
-pdf.cell(0, 10, f"Avg Pieces/Hr: {grand_avg_pieces:.2f}" if pd.notna(grand_avg_pieces) else "Avg Pieces/Hr: No Data", ln=True)
-pdf.cell(0, 10, f"Avg $/Hr: {grand_avg_dollars:.2f}" if pd.notna(grand_avg_dollars) else "Avg $/Hr: No Data", ln=True)
-pdf.cell(0, 10, f"Avg Skus/Hr: {grand_avg_skus:.2f}" if pd.notna(grand_avg_skus) else "Avg Skus/Hr: No Data", ln=True)
+    # Add grand averages at the bottom
+    pdf.ln(10)
+    pdf.set_font("Arial", "B", 12)
+    pdf.cell(0, 10, "Grand Averages", ln=True)
+    pdf.set_font("Arial", size=10)
+    pdf.cell(0, 10, f"Avg Pieces/Hr: {grand_avg_pieces:.2f}" if pd.notna(grand_avg_pieces) else "Avg Pieces/Hr: No Data", ln=True)
+    pdf.cell(0, 10, f"Avg $/Hr: {grand_avg_dollars:.2f}" if pd.notna(grand_avg_dollars) else "Avg $/Hr: No Data", ln=True)
+    pdf.cell(0, 10, f"Avg Skus/Hr: {grand_avg_skus:.2f}" if pd.notna(grand_avg_skus) else "Avg Skus/Hr: No Data", ln=True)
 
-# Save Summary PDF
-pdf.output(summary_pdf_path)
-print(f"Summary PDF created at {summary_pdf_path}")
+    # Add the recent trends in the same order as the table, highlighting declines
+    short, long = min(trend_windows), max(trend_windows)
+    pdf.ln(10)
+    pdf.set_font("Arial", "B", 12)
+    pdf.cell(0, 10, f"Trends: Last {short} Days vs Last {long} Days", ln=True)
+    pdf.set_font("Arial", "B", 10)
+    pdf.cell(70, 10, "Employee", border=1, align="C")
+    pdf.cell(40, 10, "Pieces/Hr", border=1, align="C")
+    pdf.cell(40, 10, "$/Hr", border=1, align="C")
+    pdf.cell(40, 10, "Skus/Hr", border=1, align="C")
+    pdf.ln()
+    rows = table_rows(
+        averages_df["Employee"].astype(str),
+        format_change(averages_df["Pieces/Hr Trend"]),
+        format_change(averages_df["$/Hr Trend"]),
+        format_change(averages_df["Skus/Hr Trend"]),
+    )
+    highlights = table_rows(
+        pd.Series(False, index=averages_df.index),
+        averages_df["Pieces/Hr Trend"] < 0,
+        averages_df["$/Hr Trend"] < 0,
+        averages_df["Skus/Hr Trend"] < 0,
+    )
+    pdf.set_font("Arial", size=10)
+    draw_table_rows(pdf, [70, 40, 40, 40], ["L", "C", "C", "C"], rows, highlights)
+
+    # Save Summary PDF
+    pdf.output(summary_pdf_path)
+    metrics.file_written(summary_pdf_path)
+    print(f"Summary PDF created at {summary_pdf_path}")
+
+# The __main__ guard lets extraction workers import this module without re-running the script
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Splits the production report into per-employee reports.")
+    parser.add_argument("--ingest", nargs="+", metavar="PDF",
+                        help="append these reports to the history store instead of creating the reports")
+    parser.add_argument("--backend", choices=pdf_text.backends, default=extraction_backend,
+                        help="page text extraction backend (default: %(default)s)")
+    parser.add_argument("--employee-output", choices=["files", "combined", "archive"], default=employee_report_output,
+                        help="a PDF per employee, one bookmarked PDF, or a zip of the per-employee PDFs")
+    parser.add_argument("--metrics", metavar="JSON", help="record stage timings and counters to this JSON run summary")
+    args = parser.parse_args()
+    employee_report_output = args.employee_output
+    extraction_backend = args.backend
+    if args.metrics:
+        metrics.enable()
+
+    if args.ingest:
+        with metrics.stage("ingest"):
+            ingest_reports(args.ingest)
+    else:
+        # Extraction streams straight into the export, so the two are timed as one stage
+        with metrics.stage("extraction"):
+            extract_production_data()
+
+        # Both reports share one load of the data and one pass of the per-employee averages
+        with metrics.stage("load"):
+            df = load_report_data()
+        with metrics.stage("aggregation"):
+            summary = summarize_report_data(df)
+        with metrics.stage("employee_pdfs"):
+            create_employee_reports(df, summary)
+        with metrics.stage("summary_pdf"):
+            create_summary_report(summary)
+
+    # extract_text and parse are summed over the extraction workers, so they can exceed the wall time
+    extraction_stage = "ingest" if args.ingest else "extraction"
+    metrics.write_summary(args.metrics, "Production_Splitter", rates={
+        "pages/sec": ("pages", extraction_stage),
+        "rows/sec": ("rows", extraction_stage),
+    })
@@ -0,0 +1,222 @@
+import os
+import json
+import hashlib
+import argparse
+from datetime import date
+import AbsentReport as absent
+import Production_By_Account as account
+import Production_Splitter as splitter
+import Run_Metrics as metrics
+from Production_Data import load_production_data, history_files
+
+# One entry point for the weekly run: extraction, the per-employee and summary reports, the
+# searched account reports and the call-ins report, as stages with declared inputs and outputs.
+# A stage is skipped when the fingerprint of its inputs matches its last successful run and
+# its outputs still exist, make-style. Stages share one in-memory frame instead of each
+# re-reading EmployeeProduction.csv.
+
+# Fingerprints of each stage's last successful run
+pipeline_state_path = r"C:\Users\Laptop 122\Desktop\Store Prep\06 Employee Reports\ReportPipeline.state.json"
+
+# Searched account reports to produce, one "names|stores|sort" query per line (see
+# Production_By_Account.py); the stage is skipped when the file doesn't exist
+account_queries_path = r"C:\Users\Laptop 122\Desktop\Store Prep\06 Employee Reports\AccountQueries.txt"
+
+# Source files the stages run, so a code change also re-runs them
+source_dir = os.path.dirname(os.path.abspath(__file__))
+splitter_sources = [os.path.join(source_dir, name) for name in ["Production_Splitter.py", "Production_Data.py", "Report_Tables.py", "Pdf_Extraction.py"]]
+account_sources = [os.path.join(source_dir, name) for name in ["Production_By_Account.py", "Production_Data.py", "Report_Tables.py"]]
+absent_sources = [os.path.join(source_dir, name) for name in ["AbsentReport.py", "Pdf_Extraction.py"]]
+
+class SharedData:
+    """
+    The production data shared by the stages: loaded once (or handed over by extraction) and
+    the per-employee averages and trends computed once.
+    """
+    def __init__(self):
+        self.df = None
+        self.report_df = None
+        self.summary = None
+
+    def frame(self):
+        """The production frame as load_production_data returns it (blank metrics are NaN)."""
+        if self.df is None:
+            with metrics.stage("load"):
+                self.df = load_production_data(splitter.store_path, splitter.csv_path)
+        return self.df
+
+    def report_frame(self):
+        """The frame the Production_Splitter reports use (blank metrics count as 0)."""
+        if self.report_df is None:
+            self.report_df = splitter.load_report_data(self.frame())
+        return self.report_df
+
+    def employee_summary(self):
+        if self.summary is None:
+            with metrics.stage("aggregation"):
+                self.summary = splitter.summarize_report_data(self.report_frame())
+        return self.summary
+
+    def replace(self, df):
+        """Hands the frame extraction just exported to the later stages."""
+        self.df, self.report_df, self.summary = df, None, None
+
+def run_extract(data):
+    data.replace(splitter.extract_production_data(collect=True))
+
+def run_employee_reports(data):
+    splitter.create_employee_reports(data.report_frame(), data.employee_summary())
+
+def run_summary_report(data):
+    splitter.create_summary_report(data.employee_summary())
+
+def run_account_reports(data):
+    df = data.frame()
+    account.run_batch(df, account.build_search_index(df), account.read_query_file(account_queries_path))
+
+def run_call_ins(data):
+    employee_data = list(absent.extract_employee_data(absent.input_pdf_path, absent.parse_workers))
+    absent.create_sorted_pdf(employee_data, absent.output_pdf_path)
+    print(f"Sorted PDF created at {absent.output_pdf_path}")
+
+def account_report_paths():
+    """The files the account query file will produce."""
+    if not os.path.exists(account_queries_path):
+        return []
+    return [
+        os.path.join(account.output_dir, account.report_name(names, account.expand_store_terms(stores)))
+        for names, stores, _ in account.read_query_file(account_queries_path)
+    ]
+
+def pipeline_stages():
+    """
+    The stages in run order. inputs are files whose changes re-run the stage, params any
+    other values that should, outputs the files it can write (an account query that matches
+    nothing writes no file).
+    """
+    # The Parquet store (when pyarrow is installed) is rewritten along with the CSV
+    production_data = [splitter.csv_output_path]
+    # The reports' recent averages can come from the history store, which --ingest updates
+    report_data = production_data + (history_files(splitter.history_dir) if splitter.trends_from_history else [])
+    return [
+        {
+            "name": "extract",
+            "inputs": [splitter.pdf_path] + splitter_sources,
+            # The 90-day active filter depends on the day it runs
+            "params": [str(date.today()), splitter.extraction_backend],
+            "outputs": [splitter.csv_output_path],
+            "run": run_extract,
+        },
+        {
+            "name": "employee_reports",
+            "inputs": report_data + splitter_sources,
+            "params": [splitter.employee_report_output, splitter.trends_from_history],
+            "outputs": [splitter.employee_reports_path()],
+            "run": run_employee_reports,
+        },
+        {
+            "name": "summary_report",
+            "inputs": report_data + splitter_sources,
+            "params": [splitter.trends_from_history],
+            "outputs": [splitter.summary_pdf_path],
+            "run": run_summary_report,
+        },
+        {
+            "name": "account_reports",
+            "inputs": [account_queries_path] + production_data + account_sources,
+            "params": [repr(sorted(account.account_groups.items()))],
+            "outputs": account_report_paths(),
+            "run": run_account_reports,
+        },
+        {
+            "name": "call_ins",
+            "inputs": [absent.input_pdf_path] + absent_sources,
+            "params": [absent.extraction_backend],
+            "outputs": [absent.output_pdf_path],
+            "run": run_call_ins,
+        },
+    ]
+
+def file_fingerprint(path):
+    """(path, size, modification time) of a file, or None for the stat if it doesn't exist."""
+    try:
+        stat = os.stat(path)
+        return [path, stat.st_size, stat.st_mtime_ns]
+    except OSError:
+        return [path, None]
+
+def stage_fingerprint(stage):
+    """Hash of a stage's inputs (size and modification time, like make) and params."""
+    description = [file_fingerprint(path) for path in stage["inputs"]] + [stage["params"]]
+    return hashlib.sha1(json.dumps(description).encode("utf-8")).hexdigest()
+
+def load_state():
+    try:
+        with open(pipeline_state_path, encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+def save_state(state):
+    with open(pipeline_state_path + ".tmp", "w", encoding="utf-8") as file:
+        json.dump(state, file, indent=2)
+    os.replace(pipeline_state_path + ".tmp", pipeline_state_path)
+
+def run_pipeline(only=None, force=False):
+    """
+    Runs the stages in order (only the named ones if given), skipping those that are up to
+    date unless force is set. Each successful stage's fingerprint and the outputs it left
+    behind are saved as soon as it finishes, so a failed run resumes from the stage that
+    failed. A stage is up to date when its fingerprint matches and those outputs still exist.
+    """
+    state = load_state()
+    data = SharedData()
+    for stage in pipeline_stages():
+        name = stage["name"]
+        if only and name not in only:
+            continue
+        # A stage can't run without its inputs (e.g. no call-ins report this week)
+        missing = [path for path in stage["inputs"] if not os.path.exists(path)]
+        if missing:
+            print(f"[{name}] skipped: missing input {missing[0]}")
+            continue
+
+        # Fingerprint before running: the stage's own outputs can be a later stage's inputs
+        fingerprint = stage_fingerprint(stage)
+        last_run = state.get(name)
+        up_to_date = (
+            isinstance(last_run, dict)
+            and last_run["fingerprint"] == fingerprint
+            and all(os.path.exists(path) for path in last_run["outputs"])
+        )
+        if up_to_date and not force:
+            print(f"[{name}] up to date")
+            metrics.count("stages_skipped")
+            continue
+
+        print(f"[{name}] running")
+        with metrics.stage(name):
+            stage["run"](data)
+        metrics.count("stages_run")
+        state[name] = {
+            "fingerprint": fingerprint,
+            "outputs": [path for path in stage["outputs"] if os.path.exists(path)],
+        }
+        save_state(state)
+
+if __name__ == "__main__":
+    stage_names = [stage["name"] for stage in pipeline_stages()]
+    parser = argparse.ArgumentParser(description="Runs the production and attendance reports, skipping up-to-date stages.")
+    parser.add_argument("stages", nargs="*", metavar="STAGE",
+                        help=f"stages to run (default: all): {', '.join(stage_names)}")
+    parser.add_argument("--force", action="store_true", help="run the stages even if they are up to date")
+    parser.add_argument("--metrics", metavar="JSON", help="record stage timings and counters to this JSON run summary")
+    args = parser.parse_args()
+    unknown = [name for name in args.stages if name not in stage_names]
+    if unknown:
+        parser.error(f"unknown stage {unknown[0]!r}")
+    if args.metrics:
+        metrics.enable()
+
+    run_pipeline(args.stages, args.force)
+    metrics.write_summary(args.metrics, "Report_Pipeline")
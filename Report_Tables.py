@@ -0,0 +1,55 @@
+import pandas as pd
+
+# Shared table rendering for the FPDF reports. Columns are formatted and truncated whole,
+# up front, so drawing a table is just a loop over plain tuples of strings.
+
+def format_metric(values, positive_only=False, missing="N/A"):
+    """
+    Formats a numeric column with two decimals. Missing values become `missing`, as do
+    values that aren't above 0 when positive_only is set (blank metrics are stored as 0).
+    """
+    shown = values > 0 if positive_only else values.notna()
+    return pd.Series(["%.2f" % value for value in values.tolist()], index=values.index).where(shown, missing)
+
+def format_dates(dates, missing="N/A"):
+    """Formats a datetime column as YYYY-MM-DD."""
+    return dates.dt.strftime("%Y-%m-%d").fillna(missing)
+
+def truncate_column(values, max_length):
+    """Truncates every value of a column to max_length characters, adding ellipsis if necessary."""
+    text = values.astype(str)
+    return text.where(text.str.len() <= max_length, text.str[:max_length - 3] + "...")
+
+def table_rows(*columns):
+    """Zips formatted columns into one tuple of cell text per table row."""
+    return list(zip(*(column.tolist() for column in columns)))
+
+def draw_table_rows(pdf, widths, aligns, rows, highlights=None, height=10, font_size=10):
+    """
+    Draws rows (tuples of cell text) as bordered table rows in the current font.
+
+    highlights, if given, holds a tuple of booleans per row; flagged cells are drawn in red,
+    bold and underlined (used to mark values below the grand average).
+    """
+    if highlights is None:
+        for row in rows:
+            for width, align, text in zip(widths, aligns, row):
+                pdf.cell(width, height, text, border=1, align=align)
+            pdf.ln()
+        return
+
+    for row, flags in zip(rows, highlights):
+        for width, align, text, flagged in zip(widths, aligns, row, flags):
+            if flagged:
+                pdf.set_text_color(255, 0, 0)  # Red
+                pdf.set_font("Arial", "BU", font_size)  # Bold and Underline
+                pdf.cell(width, height, text, border=1, align=align)
+                pdf.set_text_color(0, 0, 0)  # Reset to black
+                pdf.set_font("Arial", size=font_size)  # Reset to normal font
+            else:
+                pdf.cell(width, height, text, border=1, align=align)
+        pdf.ln()
+
+def format_change(values, missing="N/A"):
+    """Formats a percent-change column as a signed percentage with one decimal, e.g. "+4.2%"."""
+    return pd.Series(["%+.1f%%" % value for value in values.tolist()], index=values.index).where(values.notna(), missing)
@@ -0,0 +1,209 @@
+import os
+import time
+import queue
+import hashlib
+import argparse
+import threading
+import traceback
+import Report_Pipeline as pipeline
+
+# watchdog is optional: it delivers the folder's change events as they happen (inotify on Linux,
+# ReadDirectoryChangesW on Windows); without it the watcher polls the watched files instead
+try:
+    from watchdog.observers import Observer
+except ImportError:
+    Observer = None
+
+# Long-running watcher for the "06 Employee Reports" folder: when a new production or call-ins
+# report (or the account query file) lands, it waits for the file to finish being written, then
+# queues the pipeline stages that read it, directly or through an earlier stage's outputs, to a
+# background worker. The pipeline skips whatever is already up to date, and extraction only
+# parses the pages that aren't in the page cache.
+
+# Folder the reports are dropped into
+watch_dir = r"C:\Users\Laptop 122\Desktop\Store Prep\06 Employee Reports"
+
+# A file counts as written once its size and modification time haven't changed for this long
+settle_seconds = 10
+
+# How often (seconds) pending files are checked, and the watched files polled without watchdog
+poll_seconds = 2
+
+def watched_paths():
+    """
+    The pipeline's input files other than its source files and the files its own stages write
+    (e.g. EmployeeProduction.csv): the report PDFs and the account query file.
+    """
+    stages = pipeline.pipeline_stages()
+    outputs = {path_key(path) for stage in stages for path in stage["outputs"]}
+    paths = {path for stage in stages for path in stage["inputs"] if path_key(path) not in outputs}
+    return sorted(path for path in paths if os.path.dirname(os.path.abspath(path)) != pipeline.source_dir)
+
+def path_key(path):
+    """Comparable form of a path (Windows paths compare case-insensitively)."""
+    return os.path.normcase(os.path.abspath(path))
+
+def affected_stages(paths):
+    """Names of the stages that read any of paths, directly or through an earlier stage's outputs."""
+    changed = {path_key(path) for path in paths}
+    names = []
+    for stage in pipeline.pipeline_stages():
+        if changed & {path_key(path) for path in stage["inputs"]}:
+            names.append(stage["name"])
+            changed.update(path_key(path) for path in stage["outputs"])
+    return names
+
+def file_complete(path):
+    """Whether a settled file looks whole: a PDF must end with its %%EOF marker."""
+    if not path.lower().endswith(".pdf"):
+        return True
+    try:
+        with open(path, "rb") as file:
+            file.seek(max(0, os.path.getsize(path) - 1024))
+            return b"%%EOF" in file.read()
+    except OSError:
+        return False
+
+def file_digest(path):
+    """SHA-1 of a file's contents, so a report dropped again unchanged doesn't re-run anything."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+class ChangeHandler:
+    """watchdog event handler: queues the path of every created, modified or moved-in file."""
+    # Opening and reading a file (as the watcher and the stages do) raises events too
+    event_types = {"created", "modified", "moved", "closed"}
+
+    def __init__(self, changes):
+        self.changes = changes
+
+    def dispatch(self, event):
+        if not event.is_directory and event.event_type in self.event_types:
+            self.changes.put(getattr(event, "dest_path", "") or event.src_path)
+
+def run_jobs(jobs):
+    """
+    Background worker: runs each queued list of stage names through the pipeline, one run at a
+    time. Jobs queued while a run is going are folded into the next run. None stops it.
+    """
+    while True:
+        stages = jobs.get()
+        if stages is None:
+            return
+        stopping = False
+        while not jobs.empty():
+            more = jobs.get()
+            if more is None:
+                stopping = True
+                break
+            stages = stages + [name for name in more if name not in stages]
+        print(f"Running {', '.join(stages)}")
+        try:
+            pipeline.run_pipeline(stages)
+        except Exception:
+            # Keep watching; the failed stage's fingerprint isn't saved, so the next run retries it
+            traceback.print_exc()
+        print("Waiting for new reports")
+        if stopping:
+            return
+
+class ReportWatcher:
+    """
+    Watches the pipeline's input files and queues the stages a settled change affects. Changes
+    come from watchdog events when it's installed (and poll is False), else from polling.
+    """
+    def __init__(self, directory, poll=False):
+        self.directory = directory
+        self.paths = {path_key(path): path for path in watched_paths()}
+        self.poll = poll or Observer is None
+        self.changes = queue.Queue()
+        self.jobs = queue.Queue()
+        self.pending = {}  # Path -> (file fingerprint, when it was last seen changing)
+        self.stats = {key: pipeline.file_fingerprint(path) for key, path in self.paths.items()}
+        self.digests = {}  # Path -> digest of the contents the last queued run was for
+
+    def notice(self, path):
+        """Starts (or restarts) the settle timer of a watched file that changed."""
+        key = path_key(path)
+        if key in self.paths:
+            self.pending[key] = (pipeline.file_fingerprint(self.paths[key]), time.monotonic())
+
+    def poll_paths(self):
+        for key, path in self.paths.items():
+            stat = pipeline.file_fingerprint(path)
+            if stat != self.stats[key]:
+                self.stats[key] = stat
+                self.notice(path)
+
+    def settled_paths(self):
+        """The pending files that finished being written with new contents since their last run."""
+        settled = []
+        for key, (stat, since) in list(self.pending.items()):
+            path = self.paths[key]
+            current = pipeline.file_fingerprint(path)
+            if current[1] is None:
+                del self.pending[key]  # Deleted (or renamed away) before it settled
+            elif current != stat:
+                self.pending[key] = (current, time.monotonic())  # Still being written
+            elif time.monotonic() - since >= settle_seconds and file_complete(path):
+                del self.pending[key]
+                digest = file_digest(path)
+                if self.digests.get(key) != digest:
+                    self.digests[key] = digest
+                    settled.append(path)
+                else:
+                    print(f"{path} is unchanged; nothing to do")
+        return settled
+
+    def run(self):
+        """Watches until interrupted, starting with one run of every stage (up-to-date stages are skipped)."""
+        worker = threading.Thread(target=run_jobs, args=(self.jobs,), daemon=True)
+        worker.start()
+        for key, path in self.paths.items():
+            if os.path.exists(path):
+                self.digests[key] = file_digest(path)
+        self.jobs.put([stage["name"] for stage in pipeline.pipeline_stages()])
+
+        observer = None
+        if not self.poll:
+            observer = Observer()
+            observer.schedule(ChangeHandler(self.changes), self.directory)
+            observer.start()
+        print(f"Watching {self.directory} ({'polling' if observer is None else 'file system events'})")
+
+        try:
+            while True:
+                try:
+                    self.notice(self.changes.get(timeout=poll_seconds))
+                    while not self.changes.empty():
+                        self.notice(self.changes.get())
+                except queue.Empty:
+                    pass
+                if observer is None:
+                    self.poll_paths()
+                settled = self.settled_paths()
+                if settled:
+                    stages = affected_stages(settled)
+                    print(f"New {', '.join(os.path.basename(path) for path in settled)}: queued {', '.join(stages)}")
+                    self.jobs.put(stages)
+        except KeyboardInterrupt:
+            print("Stopping")
+        finally:
+            if observer is not None:
+                observer.stop()
+                observer.join()
+            self.jobs.put(None)
+            worker.join()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Watches the reports folder and refreshes the reports when a new one lands.")
+    parser.add_argument("--poll", action="store_true", help="poll the report files instead of using file system events")
+    parser.add_argument("--settle", type=float, default=settle_seconds,
+                        help="seconds a file must stay unchanged before it is processed (default: %(default)s)")
+    args = parser.parse_args()
+    settle_seconds = args.settle
+
+    ReportWatcher(watch_dir, args.poll).run()
@@ -0,0 +1,93 @@
+import json
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# Lightweight run instrumentation shared by the scripts: wall time per stage, counters
+# (pages, rows, skipped lines, ...) and the files written, saved as a JSON run summary.
+# Off by default; while disabled every call returns right away, so the scripts can leave
+# their stage()/count() calls in place. Stage and counter calls sit at page/chunk level,
+# never per line, except on rare paths like skipped lines.
+
+enabled = False
+stages = {}    # Stage name -> [seconds, calls]
+counters = {}  # Counter name -> total
+files = []     # Paths of the files written
+started = None
+
+def enable():
+    """Starts recording (clearing anything recorded before)."""
+    global enabled, started
+    reset()
+    enabled = True
+    started = time.perf_counter()
+
+def reset():
+    stages.clear()
+    counters.clear()
+    files.clear()
+
+@contextmanager
+def stage(name):
+    """Adds the wall time of the with-block to the named stage."""
+    if not enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_time(name, time.perf_counter() - start)
+
+def add_time(name, seconds, calls=1):
+    totals = stages.setdefault(name, [0.0, 0])
+    totals[0] += seconds
+    totals[1] += calls
+
+def count(name, amount=1):
+    if enabled:
+        counters[name] = counters.get(name, 0) + amount
+
+def file_written(path):
+    if enabled:
+        files.append(path)
+
+def snapshot():
+    """The numbers recorded so far, in a form that can be sent back from a worker process."""
+    return {"stages": {name: list(totals) for name, totals in stages.items()}, "counters": dict(counters)}
+
+def merge(recorded):
+    """Folds a worker's snapshot() into this process's numbers."""
+    for name, (seconds, calls) in recorded["stages"].items():
+        add_time(name, seconds, calls)
+    for name, amount in recorded["counters"].items():
+        count(name, amount)
+
+def summary(script, rates=None):
+    """
+    The run summary as a dict. rates maps a rate name to (counter, stage), e.g.
+    {"pages/sec": ("pages", "extraction")}, and is computed from the recorded totals.
+    """
+    rates = rates or {}
+    return {
+        "script": script,
+        "finished": datetime.now().isoformat(timespec="seconds"),
+        "wall_seconds": round(time.perf_counter() - started, 6) if started is not None else None,
+        "stages": {name: {"seconds": round(seconds, 6), "calls": calls} for name, (seconds, calls) in stages.items()},
+        "counters": dict(counters),
+        "rates": {
+            name: round(counters.get(counter, 0) / stages[stage_name][0], 2)
+            for name, (counter, stage_name) in rates.items()
+            if stage_name in stages and stages[stage_name][0] > 0
+        },
+        "files_written": len(files),
+        "files": list(files),
+    }
+
+def write_summary(path, script, rates=None):
+    """Writes the run summary to path as JSON (does nothing while disabled)."""
+    if not enabled:
+        return
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(summary(script, rates), file, indent=2)
+    print(f"Run summary written to {path}")
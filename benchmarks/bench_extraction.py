@@ -0,0 +1,104 @@
+"""
+Pages/sec and row-for-row equivalence of the Pdf_Extraction backends on synthetic reports
+(see synthetic_reports.py).
+
+Every backend extracts and parses the whole production report and the whole call-ins report
+in a single process. Each result is compared row for row against the current path:
+pdfplumber for the production report, PyPDF2 for the call-ins report. The first few rows
+that differ are printed. Production rows are also checked against the rows the report was
+generated from ("wrong").
+
+The "columns" backend reads the metrics from their column bands. It is expected to differ
+from the text path wherever the text parser misreads a row: a store name that ends in a bare
+number is taken for a metric, and so is a four-digit Skus/Hr next to a blank Pieces/Hr.
+
+Usage: python benchmarks/bench_extraction.py [--rows 5000] [--show 5] [--output results.json]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import AbsentReport  # noqa: E402
+import Pdf_Extraction as pdf_text  # noqa: E402
+import Production_Splitter as splitter  # noqa: E402
+from synthetic_reports import production_lines, write_call_ins_report, write_production_report  # noqa: E402
+
+def generated_rows(rows):
+    """The rows a synthetic production report of the given size was generated from, as parse_page reads them."""
+    expected = []
+    for line in production_lines(rows):
+        if line[2] == "Pieces/Hr":
+            employee = " ".join(cell for cell in line if cell)
+            continue
+        expected.append(dict(zip(splitter.production_columns, [employee] + line)))
+    return expected
+
+def production_rows(path, backend):
+    bands = pdf_text.find_column_bands(path) if backend == "columns" else None
+    pages = splitter.parse_pages(path, range(pdf_text.page_count(path)), backend, bands)
+    return list(splitter.parse_employee_data_with_carryover(pages))
+
+def call_in_rows(path, backend):
+    return list(AbsentReport.extract_employee_data(path, workers=1, backend=backend))
+
+def differences(rows, reference):
+    """Indexes of the rows that differ from the reference's, counting missing or extra rows."""
+    different = [i for i, (row, expected) in enumerate(zip(rows, reference)) if row != expected]
+    return different + list(range(min(len(rows), len(reference)), max(len(rows), len(reference))))
+
+def bench_report(name, path, read_rows, backends, reference_backend, show, expected=None):
+    """
+    Times every backend on the report and compares its rows to the reference backend's (and
+    to the expected rows, if given).
+    """
+    pages = pdf_text.page_count(path)
+    results = {}
+    reference = None
+    for backend in [reference_backend] + [backend for backend in backends if backend != reference_backend]:
+        start = time.perf_counter()
+        rows = read_rows(path, backend)
+        seconds = time.perf_counter() - start
+        if reference is None:
+            reference = rows
+        different = differences(rows, reference)
+        wrong = len(differences(rows, expected)) if expected is not None else None
+        results[backend] = {
+            "seconds": seconds, "pages/sec": pages / seconds, "rows": len(rows), "rows_different": len(different), "rows_wrong": wrong,
+        }
+        print(f"{name:12}{backend:12}{seconds:10.3f}{pages / seconds:12.1f}{len(rows):8}{len(different):11}{'' if wrong is None else wrong:>7}")
+        for i in different[:show]:
+            print(f"    {reference_backend}: {reference[i] if i < len(reference) else None}")
+            print(f"    {backend}: {rows[i] if i < len(rows) else None}")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compares the PDF extraction backends on synthetic reports.")
+    parser.add_argument("--rows", type=int, default=5000, help="report size in rows (default 5000)")
+    parser.add_argument("--show", type=int, default=3, help="differing rows to print per backend (default 3)")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    backends = pdf_text.backends if pdf_text.pdfium is not None else ["pdfplumber", "pypdf2"]
+    print(f"{'report':12}{'backend':12}{'seconds':>10}{'pages/sec':>12}{'rows':>8}{'different':>11}{'wrong':>7}")
+    with tempfile.TemporaryDirectory() as directory:
+        production_pdf = os.path.join(directory, "production.pdf")
+        call_ins_pdf = os.path.join(directory, "callins.pdf")
+        write_production_report(production_pdf, args.rows)
+        write_call_ins_report(call_ins_pdf, args.rows)
+        results = {
+            "rows": args.rows,
+            "production": bench_report("production", production_pdf, production_rows, backends, "pdfplumber", args.show, generated_rows(args.rows)),
+            "callins": bench_report(
+                "callins", call_ins_pdf, call_in_rows, [backend for backend in backends if backend != "columns"], "pypdf2", args.show,
+            ),
+        }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+        print(f"Results written to {args.output}")
@@ -0,0 +1,88 @@
+"""
+Memory and groupby-speed comparison of the compact production frame against the object-dtype frame.
+
+Builds a synthetic multi-year production history (hundreds of employees and stores). It
+compares two frames: the one the reports used to work on (object strings for Employee,
+Store and Date, float64 metrics) and the compact one load_production_data returns
+(categorical Employee/Store, datetime64 Date, float64 metrics). For each it reports the
+deep memory usage and times the per-employee and per-store averages. It also checks that
+both frames produce the same averages to the cent, over the whole history and over its
+first few hundred rows, where most groups average only one to three values and a metric
+stored with less precision would round cent ties the other way.
+
+Usage: python benchmarks/bench_frame_memory.py [row count]
+"""
+import os
+import sys
+import tempfile
+import timeit
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Production_Data import load_production_data, metric_columns, summarize_employees  # noqa: E402
+
+def synthetic_history(count, employees=400, stores=250, days=3 * 365, seed=42):
+    """Production rows as the splitter writes them to EmployeeProduction.csv (all text)."""
+    rng = np.random.default_rng(seed)
+    employee_names = np.array([f"EMPLOYEE {number:03d}, FIRST" for number in range(employees)])
+    store_names = np.array([f"STORE #{number:03d} MAIN STREET" for number in range(stores)])
+    dates = pd.date_range("2022-01-01", periods=days).strftime("%m/%d/%Y").to_numpy()
+    pieces = rng.integers(100, 5000, count)
+    dollars = np.round(rng.uniform(5, 1500, count), 2)
+    skus = rng.integers(1, 500, count)
+    return pd.DataFrame({
+        "Employee": employee_names[rng.integers(0, employees, count)],
+        "Date": dates[rng.integers(0, days, count)],
+        "Store": store_names[rng.integers(0, stores, count)],
+        "Pieces/Hr": [f"{value:,}" for value in pieces.tolist()],
+        "$/Hr": [f"${value:,.2f}" for value in dollars.tolist()],
+        "Skus/Hr": skus.astype(str),
+    })
+
+def object_frame(csv_path):
+    """The cleaned frame as the scripts built it before the shared loader: object strings, float64 metrics."""
+    df = pd.read_csv(csv_path)
+    for column in metric_columns:
+        df[column] = pd.to_numeric(df[column].astype(str).str.replace("[\\$,]", "", regex=True), errors="coerce")
+    return df
+
+def positive_means(df, key):
+    metrics = df[metric_columns].astype("float64")
+    return metrics.where(metrics > 0).groupby(df[key], observed=True).mean()
+
+def megabytes(df):
+    return df.memory_usage(deep=True).sum() / 1e6
+
+def best_time(function, repeat=5):
+    return min(timeit.repeat(function, number=1, repeat=repeat))
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, "EmployeeProduction.csv")
+        synthetic_history(count).to_csv(csv_path, index=False)
+        wide = object_frame(csv_path)
+        # No store in the directory, so this goes through the CSV path of the loader
+        compact = load_production_data(os.path.join(directory, "missing.parquet"), csv_path)
+
+    # Small groups average a couple of values each, so any change in the stored values shows up
+    small = min(count, 600)
+    for rows in [count, small]:
+        for key in ["Employee", "Store"]:
+            expected = positive_means(wide.head(rows), key).round(2)
+            actual = positive_means(compact.head(rows), key).round(2)
+            actual.index = actual.index.astype(object)
+            if not expected.equals(actual):
+                print(f"per-{key} averages over the first {rows:,} rows differ between the frames")
+                sys.exit(1)
+    print(f"{count:,} rows; per-employee and per-store averages identical on both frames (also over the first {small:,})")
+
+    print(f"{'':10}{'memory MB':>12}{'by employee':>14}{'by store':>12}{'summary':>12}")
+    for label, df in [("object", wide), ("compact", compact)]:
+        by_employee = best_time(lambda: positive_means(df, "Employee"))
+        by_store = best_time(lambda: positive_means(df, "Store"))
+        summary = best_time(lambda: summarize_employees(df))
+        print(f"{label:10}{megabytes(df):12.1f}{by_employee * 1000:12.1f}ms{by_store * 1000:10.1f}ms{summary * 1000:10.1f}ms")
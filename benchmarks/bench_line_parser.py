@@ -0,0 +1,120 @@
+"""
+Throughput comparison of Production_Splitter.parse_page against the original line parser.
+
+Generates synthetic report pages (employee headers, footers, ordinary rows and the awkward
+shapes: numbers inside store names, metrics out of order, non-ASCII text), checks that
+parse_page produces exactly the rows the original parser did, then times both.
+
+Usage: python benchmarks/bench_line_parser.py [line count]
+"""
+import os
+import random
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Production_Splitter import parse_page  # noqa: E402
+
+stores = [
+    "PICK #874 +RX, KENOSHA-HWY 338", "MARIANO'S #501", "METRO MARKET", "SENDIK'S FOOD MARKET",
+    "FESTIVAL FOODS #12", "PIGGLY WIGGLY #9", "WOODMAN'S 24 HR", "CAFÉ SHOP",
+]
+names = ["SMITH, JOHN", "DOE, JANE", "NGUYEN, AN", "O'BRIEN, PAT Pieces/Hr $/Hr Skus/Hr"]
+
+def reference_parse_page(page_text):
+    """The per-token parser as it was before parse_page, kept verbatim as the baseline."""
+    rows = []
+    last_employee = None
+    lines = page_text.split("\n")
+    for line in lines:
+        # Skip report date and page footer lines
+        if re.match(r"\w+day, \w+ \d{1,2}, \d{4} Page \d+ of \d+", line):
+            continue
+
+        # Check for an employee name (no date or numeric values)
+        if not any(char.isdigit() for char in line) and line.strip():
+            last_employee = line.strip()  # Update the current employee name
+        else:
+            # Split the line into components
+            parts = line.split()
+            if len(parts) >= 2:
+                try:
+                    date = parts[0]  # First column is the date
+                    store = []
+                    pieces_hr = dollars_hr = skus_hr = ""
+
+                    # Start parsing each part
+                    for part in parts[1:]:
+                        if part.startswith("$") and not dollars_hr:
+                            # Found $/Hr
+                            dollars_hr = part
+                        elif part.replace(",", "").isdigit() and len(part.replace(",", "")) >= 3 and not pieces_hr:
+                            # Found Pieces/Hr
+                            pieces_hr = part
+                        elif part.replace(",", "").isdigit() and not skus_hr:
+                            # Found Skus/Hr
+                            skus_hr = part
+                        else:
+                            # Add to store name
+                            store.append(part)
+
+                    # Combine store back into a single string
+                    store = " ".join(store).strip()
+
+                    # Append the row to the data
+                    rows.append({
+                        "Employee": last_employee,
+                        "Date": date,
+                        "Store": store,
+                        "Pieces/Hr": pieces_hr,
+                        "$/Hr": dollars_hr,
+                        "Skus/Hr": skus_hr,
+                    })
+                except ValueError:
+                    continue
+    return rows
+
+def random_metric(kind):
+    if kind == "pieces":
+        return random.choice([f"{random.randint(100, 9999):,}", str(random.randint(100, 999)), "87", ""])
+    if kind == "dollars":
+        return random.choice([f"${random.uniform(5, 1500):,.2f}", "$", ""])
+    return random.choice([str(random.randint(1, 99)), str(random.randint(100, 2000)), "1,204", "²", ""])
+
+def random_line():
+    roll = random.random()
+    if roll < 0.05:
+        return random.choice(names)
+    if roll < 0.07:
+        return f"Monday, January {random.randint(1, 31)}, 2025 Page {random.randint(1, 900)} of 900"
+    if roll < 0.09:
+        return random.choice(["", "   ", "12345", "\t", "Totals"])
+    metrics = [random_metric("pieces"), random_metric("dollars"), random_metric("skus")]
+    if roll < 0.15:
+        random.shuffle(metrics)
+    date = f"{random.randint(1, 12)}/{random.randint(1, 28)}/2024"
+    return " ".join(part for part in [date, random.choice(stores), *metrics] if part)
+
+def time_parser(parser, pages, repeat=7):
+    return min(timeit.repeat(lambda: [parser(page) for page in pages], number=1, repeat=repeat))
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    random.seed(42)
+    lines = [random_line() for _ in range(count)]
+    pages = ["\n".join(lines[start:start + 40]) for start in range(0, count, 40)]
+
+    # parse_page leaves rows before the page's first employee name unresolved (None), which
+    # is also what the reference parser produces for them on a page of its own
+    mismatches = [page for page in pages if parse_page(page)["rows"] != reference_parse_page(page)]
+    if mismatches:
+        print(f"{len(mismatches)} pages parsed differently, e.g. {mismatches[0]!r}")
+        sys.exit(1)
+    print(f"{count:,} lines ({len(pages):,} pages) parsed identically by both parsers")
+
+    baseline = time_parser(reference_parse_page, pages)
+    scanned = time_parser(parse_page, pages)
+    print(f"original parser: {count / baseline:12,.0f} lines/sec")
+    print(f"parse_page:      {count / scanned:12,.0f} lines/sec ({baseline / scanned:.2f}x)")
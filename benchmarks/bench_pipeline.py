@@ -0,0 +1,193 @@
+"""
+Per-stage timings of the three scripts on synthetic reports (see synthetic_reports.py).
+
+For each size it generates an EmployeeProductionByStoreReport and a CallInsReport, then
+times every stage separately:
+
+  production/<rows>/extraction   text of every page (Production_Splitter's extraction_backend)
+  production/<rows>/parsing      parse_page + carryover stitching
+  production/<rows>/cleaning     CSV/Parquet export (clean, 90-day filter) and loading it back
+  production/<rows>/aggregation  summarize_report_data (averages and 30/90-day trends)
+  production/<rows>/rendering    per-employee PDFs and the summary PDF
+  production/<rows>/combined     the employee reports as one bookmarked PDF instead
+  production/<rows>/archive      the employee reports as one zip of PDFs instead
+  account/<rows>/index           Production_By_Account search index
+  account/<rows>/rendering       a fixed set of searched reports
+  callins/<rows>/extraction      text of every page (AbsentReport's extraction_backend)
+  callins/<rows>/parsing         AbsentReport.parse_page_text
+  callins/<rows>/rendering       AbsentReport.create_sorted_pdf
+
+Everything runs in a single process (extraction_workers = report_workers = 1) with the
+page cache off, so the numbers measure the code rather than the pool or the cache.
+Results are saved as JSON ({"stages": {stage: seconds}, ...}). Pass --compare with an
+earlier result file to print the ratio for every stage and flag the ones that got slower.
+
+Usage: python benchmarks/bench_pipeline.py [--rows 100 1000 10000] [--output results.json]
+                                           [--compare baseline.json] [--threshold 0.1]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import AbsentReport  # noqa: E402
+import Pdf_Extraction as pdf_text  # noqa: E402
+import Production_By_Account as account  # noqa: E402
+import Production_Splitter as splitter  # noqa: E402
+from synthetic_reports import write_call_ins_report, write_production_report  # noqa: E402
+
+# Searched reports timed per size: (names, stores, sort)
+account_queries = [([], ["kroger"], "2"), ([], ["f"], "1"), (["smith"], [], "3"), (["garcia", "lee"], ["pick"], "1")]
+
+class StageTimer:
+    """Records the best wall-clock time of each named stage over the runs."""
+    def __init__(self):
+        self.stages = {}
+
+    def __call__(self, name, function, *args):
+        start = time.perf_counter()
+        result = function(*args)
+        elapsed = time.perf_counter() - start
+        self.stages[name] = min(elapsed, self.stages.get(name, elapsed))
+        return result
+
+def extract_texts(path):
+    return list(pdf_text.page_texts(path, backend=splitter.extraction_backend))
+
+def extract_call_in_texts(path):
+    return list(pdf_text.page_texts(path, backend=AbsentReport.extraction_backend))
+
+def parse_call_in_texts(texts):
+    return [employee for text in texts for employee in AbsentReport.parse_page_text(text)]
+
+def parse_texts(texts):
+    return list(splitter.parse_employee_data_with_carryover(splitter.parse_page(text) for text in texts))
+
+def clean_rows(rows):
+    splitter.write_production_csv(rows, splitter.csv_output_path, splitter.store_output_path)
+    return splitter.load_report_data()
+
+def render_reports(df, summary):
+    # Without the last run's manifest every employee's PDF is rendered, as on a first run
+    manifest_path = os.path.join(splitter.output_dir, splitter.report_manifest_name)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+    splitter.create_employee_reports(df, summary)
+    splitter.create_summary_report(summary)
+
+def render_employee_output(df, summary, mode):
+    splitter.employee_report_output = mode
+    try:
+        splitter.create_employee_reports(df, summary)
+    finally:
+        splitter.employee_report_output = "files"
+
+def render_account_reports(df, index):
+    for names, stores, sort_choice in account_queries:
+        account.run_query(df, index, names, stores, sort_choice)
+
+def bench_size(timer, rows, directory):
+    """Generates the reports for one size and times every stage on them."""
+    production_pdf = os.path.join(directory, f"production-{rows}.pdf")
+    call_ins_pdf = os.path.join(directory, f"callins-{rows}.pdf")
+    write_production_report(production_pdf, rows)
+    write_call_ins_report(call_ins_pdf, rows)
+
+    splitter.csv_output_path = splitter.csv_path = os.path.join(directory, "EmployeeProduction.csv")
+    splitter.store_output_path = splitter.store_path = os.path.join(directory, "EmployeeProduction.parquet")
+    splitter.output_dir = os.path.join(directory, "EmployeeProductionReports")
+    splitter.summary_pdf_path = os.path.join(directory, "ProductionAveragesReport.pdf")
+    splitter.combined_report_path = os.path.join(directory, "EmployeeProductionReports.pdf")
+    splitter.report_archive_path = os.path.join(directory, "EmployeeProductionReports.zip")
+    account.store_path, account.file_path = splitter.store_path, splitter.csv_path
+    account.output_dir = os.path.join(directory, "SearchedProductionReports")
+
+    texts = timer(f"production/{rows}/extraction", extract_texts, production_pdf)
+    parsed = timer(f"production/{rows}/parsing", parse_texts, texts)
+    df = timer(f"production/{rows}/cleaning", clean_rows, parsed)
+    summary = timer(f"production/{rows}/aggregation", splitter.summarize_report_data, df)
+    timer(f"production/{rows}/rendering", render_reports, df, summary)
+    timer(f"production/{rows}/combined", render_employee_output, df, summary, "combined")
+    timer(f"production/{rows}/archive", render_employee_output, df, summary, "archive")
+
+    df = account.load_production_data(account.store_path, account.file_path)
+    index = timer(f"account/{rows}/index", account.build_search_index, df)
+    timer(f"account/{rows}/rendering", render_account_reports, df, index)
+
+    texts = timer(f"callins/{rows}/extraction", extract_call_in_texts, call_ins_pdf)
+    employees = timer(f"callins/{rows}/parsing", parse_call_in_texts, texts)
+    timer(f"callins/{rows}/rendering", AbsentReport.create_sorted_pdf, employees, os.path.join(directory, "SortedAttendancePoints.pdf"))
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(stages, baseline_path, threshold):
+    """Prints each stage's time against the baseline's; returns the stages more than threshold slower."""
+    with open(baseline_path, encoding="utf-8") as file:
+        baseline = json.load(file)["stages"]
+    slower = []
+    print(f"\n{'stage':34}{'baseline':>10}{'now':>10}{'ratio':>8}")
+    for name, seconds in stages.items():
+        if name not in baseline:
+            continue
+        ratio = seconds / baseline[name] if baseline[name] else float("inf")
+        flag = "  SLOWER" if ratio > 1 + threshold else ""
+        print(f"{name:34}{baseline[name]:10.3f}{seconds:10.3f}{ratio:8.2f}{flag}")
+        if flag:
+            slower.append(name)
+    return slower
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Times every stage of the report scripts on synthetic reports.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000, 10000],
+                        help="report sizes in rows (default: 100 1000 10000; up to 50000)")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per size; the best time of each stage is kept")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare against an earlier results file")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="flag stages more than this fraction slower than the baseline (default 0.1)")
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")  # fpdf2 deprecation warnings from the report code
+    splitter.extraction_workers = splitter.report_workers = 1
+    splitter.page_cache_path = None
+    timer = StageTimer()
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in args.rows:
+            for _ in range(args.repeat):
+                bench_size(timer, rows, directory)
+
+    # The scripts print progress as they go; the table goes last so it's easy to find
+    print(f"\n{'stage':34}{'seconds':>10}")
+    for name, seconds in timer.stages.items():
+        print(f"{name:34}{seconds:10.3f}")
+
+    results = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "rows": args.rows,
+        "stages": timer.stages,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+        print(f"Results written to {args.output}")
+    if args.compare and compare(timer.stages, args.compare, args.threshold):
+        sys.exit(1)
@@ -0,0 +1,132 @@
+"""
+Synthetic EmployeeProductionByStoreReport and CallInsReport PDFs for the benchmarks.
+
+The reports are laid out the way the parsers expect them: employee header lines
+("SMITH, JOHN Pieces/Hr $/Hr Skus/Hr"), one "<date> <store> <pieces> <$/hr> <skus>" line per
+production row with comma- and $-formatted metrics (some left blank), set in Date, Store and
+right-aligned metric columns under the header's titles like the real report, call-in lines
+("SMITH, JOHN - 3 Value") and a "Monday, January 6, 2025 Page 1 of N" footer on every page.
+Employee blocks run across page breaks so the carryover logic is exercised. Content is
+seeded, so the same arguments always produce the same report; production dates are
+relative to today so the rows count as active.
+
+Usage: python benchmarks/synthetic_reports.py production|callins <row count> <output.pdf>
+"""
+import random
+import sys
+from datetime import date, timedelta
+
+from fpdf import FPDF
+
+last_names = [
+    "SMITH", "JOHNSON", "WILLIAMS", "BROWN", "JONES", "GARCIA", "MILLER", "DAVIS", "RODRIGUEZ",
+    "MARTINEZ", "HERNANDEZ", "LOPEZ", "GONZALEZ", "WILSON", "ANDERSON", "THOMAS", "TAYLOR",
+    "MOORE", "JACKSON", "MARTIN", "LEE", "PEREZ", "THOMPSON", "WHITE", "HARRIS", "NGUYEN",
+    "O'BRIEN", "KIM", "DOE", "SANCHEZ",
+]
+first_names = [
+    "JOHN", "JANE", "LUIS", "AN", "PAT", "SOO", "MARIA", "JAMES", "LINDA", "ROBERT",
+    "PATRICIA", "MICHAEL", "BARBARA", "DAVID", "SUSAN", "JOSE", "KAREN", "DANIEL",
+]
+chains = [
+    "PICK", "MARIANO'S", "METRO MARKET", "SENDIK'S FOOD", "FESTIVAL FOODS", "PIGGLY WIGGLY",
+    "WOODMAN'S", "KWIK TRIP", "ROUNDY'S", "OUTPOST NATURAL",
+]
+
+# Lines per page and the footer every page ends with
+lines_per_page = 40
+footer = "Monday, January 6, 2025 Page {page} of {pages}"
+
+# (x, alignment) of the production report's Date, Store, Pieces/Hr, $/Hr and Skus/Hr columns
+production_columns = [(10, "L"), (35, "L"), (140, "R"), (165, "R"), (190, "R")]
+
+def employee_names(count, rng):
+    """count distinct "LAST, FIRST" names (no digits, so the parsers read them as headers)."""
+    names = [f"{last}, {first}" for last in last_names for first in first_names]
+    rng.shuffle(names)
+    return names[:count]
+
+def store_names(count, rng):
+    """count distinct store names, some with the "#874 +RX, KENOSHA-HWY 338" shape of real ones."""
+    names = set()
+    while len(names) < count:
+        chain = rng.choice(chains)
+        number = rng.randint(1, 999)
+        if rng.random() < 0.2:
+            names.add(f"{chain} #{number} +RX, KENOSHA-HWY {rng.randint(10, 999)}")
+        elif rng.random() < 0.5:
+            names.add(f"{chain} #{number}")
+        else:
+            names.add(f"{chain} {number}")
+    return sorted(names)
+
+def production_lines(rows, seed=42):
+    """
+    Lines of an EmployeeProductionByStoreReport with the given number of production rows, each
+    a list of its production_columns cells ("" where blank).
+    """
+    rng = random.Random(seed)
+    employees = employee_names(min(len(last_names) * len(first_names), max(5, rows // 40)), rng)
+    stores = store_names(min(400, max(10, rows // 25)), rng)
+    today = date.today()
+
+    lines = []
+    employee = None
+    for _ in range(rows):
+        if employee is None or rng.random() < 1 / 30:
+            employee = rng.choice(employees)
+            lines.append([employee, "", "Pieces/Hr", "$/Hr", "Skus/Hr"])
+        day = today - timedelta(days=rng.randint(0, 180))
+        pieces = rng.choice([f"{rng.randint(100, 9999):,}", f"{rng.randint(100, 999)}", ""])
+        dollars = rng.choice([f"${rng.uniform(5, 95):,.2f}", f"${rng.uniform(1000, 2500):,.2f}", ""])
+        skus = rng.choice([str(rng.randint(1, 99)), f"{rng.randint(100, 2000):,}", ""])
+        lines.append([f"{day.month}/{day.day}/{day.year}", rng.choice(stores), pieces, dollars, skus])
+    return lines
+
+def call_in_lines(rows, seed=42):
+    """Text lines of a CallInsReport with the given number of employee point lines."""
+    rng = random.Random(seed)
+    names = [f"{last}, {first}" for last in last_names for first in first_names]
+    lines = ["Call Ins Report", "Employee Points"]
+    for number in range(rows):
+        name = names[number % len(names)] + ("" if number < len(names) else f" {chr(65 + number // len(names) % 26)}")
+        lines.append(f"{name} - {rng.choice([0, 0, 1, 2, 3, 5, 8, 12])} Value")
+        if rng.random() < 0.3:
+            day = date(2025, 1, 1) + timedelta(days=rng.randint(0, 364))
+            lines.append(f"Call In {day.month}/{day.day}/{day.year} Sick")
+    return lines
+
+def write_report_pdf(lines, path, columns=None):
+    """
+    Writes the lines lines_per_page to a page, with the report footer on every page. With
+    columns, each line is a list of cells set at the columns' (x, alignment).
+    """
+    pages = [lines[start:start + lines_per_page] for start in range(0, len(lines), lines_per_page)] or [[]]
+    pdf = FPDF()
+    pdf.set_auto_page_break(False)
+    pdf.set_font("Helvetica", size=9)
+    for number, page_lines in enumerate(pages, 1):
+        pdf.add_page()
+        for row, line in enumerate(page_lines):
+            if columns is None:
+                pdf.text(10, 10 + row * 6.5, line)
+                continue
+            for (x, align), cell in zip(columns, line):
+                if cell:
+                    pdf.text(x - pdf.get_string_width(cell) if align == "R" else x, 10 + row * 6.5, cell)
+        pdf.text(10, 285, footer.format(page=number, pages=len(pages)))
+    pdf.output(path)
+    return len(pages)
+
+def write_production_report(path, rows, seed=42):
+    """Writes a synthetic EmployeeProductionByStoreReport; returns its page count."""
+    return write_report_pdf(production_lines(rows, seed), path, production_columns)
+
+def write_call_ins_report(path, rows, seed=42):
+    """Writes a synthetic CallInsReport; returns its page count."""
+    return write_report_pdf(call_in_lines(rows, seed), path)
+
+if __name__ == "__main__":
+    kind, count, output = sys.argv[1], int(sys.argv[2]), sys.argv[3]
+    writer = write_production_report if kind == "production" else write_call_ins_report
+    print(f"{writer(output, count)} pages written to {output}")